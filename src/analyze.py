@@ -0,0 +1,144 @@
+"""
+Re-score every position of every game of a PDN collection with an engine, spread over a process pool, and write the
+games back out with the analysis in a comment after each move.
+
+    python analyze.py games.pdn --engine iterative_deepening:time=200 --out annotated.pdn
+
+The comment after a move gives the score of the position before it for the side that moved, the search depth and the
+engine's best move, e.g. {+2/8 best 9-14}. When another move was played, it is searched to the same depth too, and
+if its score is lower by --blunder or more, the move is marked as a blunder with the score it lost,
+e.g. {+2/8 best 9-14 blunder 1.99}. Scores are in the units of the engine's heuristic: a man is worth 1 with
+heuristics 1 and 2, and 1 to 10 by its row with heuristic 3.
+Games are read, analyzed and written in order with a bounded number of games in flight, so collections of any size go
+through in constant memory.
+"""
+from checkers import pdn
+from selfplay import parse_engine
+from session import EngineSession
+from checkers.constants import WHITE, BLACK
+from checkers.stats import SearchStats
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+import argparse
+import time
+import sys
+import os
+
+# engines whose moves come with a score
+ENGINES = ('minimax', 'alpha_beta', 'iterative_deepening')
+
+
+def analyze_game(game, engine, blunder=1):
+    """
+    Search every position of a game and annotate its moves
+    :param game: PdnGame
+    :param engine: (name, parameters) of the engine (see selfplay.parse_engine), one of ENGINES
+    :param blunder: score lost by a move for it to be marked as a blunder
+    :return: (annotated PdnGame, {'positions', 'blunders', 'error', 'stats'}), error the text of an illegal move or
+    of moves the reader could not read (the game is then returned unannotated) or None, stats the
+    SearchStats.as_dict() of the searches
+    """
+    name, params = engine
+    stats = SearchStats()
+    if game.error is not None:
+        return game, {'positions': 0, 'blunders': 0, 'error': game.error, 'stats': stats.as_dict()}
+    sessions = {color: EngineSession(name, color, params, stats) for color in (BLACK, WHITE)}
+    comments = dict(game.comments)
+    positions = blunders = 0
+    try:
+        for ply, (board, color, move) in enumerate(game.replay(), 1):
+            session = sessions[color]
+            best = pdn.played_move(board, color, session.move(board))
+            positions += 1
+            text = '%+g/%d best %s' % (session.value, session.depth,
+                                       pdn.move_text(best.start, best.end, best.captured))
+            if move != best:
+                lost = session.value - session.score_move(board, move)
+                if lost >= blunder:
+                    text += ' blunder %g' % lost
+                    blunders += 1
+            comments[ply] = comments[ply] + ' ' + text if ply in comments else text
+    except ValueError as error:
+        return game, {'positions': positions, 'blunders': 0, 'error': str(error), 'stats': stats.as_dict()}
+    annotated = pdn.PdnGame(dict(game.tags, Annotator=_engine_spec(engine)), game.moves, comments, game.result)
+    return annotated, {'positions': positions, 'blunders': blunders, 'error': None, 'stats': stats.as_dict()}
+
+
+def _engine_spec(engine):
+    name, params = engine
+    return '%s:%s' % (name, ','.join('%s=%s' % item for item in sorted(params.items())))
+
+
+def run(source, output, engine, workers=None, blunder=1, log=None):
+    """
+    Analyze the games of source over a process pool and write them to output in the same order
+    :param source: iterable of PDN lines, such as an open file
+    :param output: writable text file
+    :param engine: engine spec (see selfplay.parse_engine)
+    :param workers: number of worker processes (os.cpu_count() if None)
+    :param blunder: score lost by a move for it to be marked as a blunder
+    :param log: file to write progress and errors to, None for silence
+    :return: {'games', 'positions', 'blunders', 'errors', 'nodes', 'time'}
+    """
+    engine = parse_engine(engine)
+    if engine[0] not in ENGINES:
+        raise ValueError('%s gives no scores, analyze with one of %s' % (engine[0], ', '.join(ENGINES)))
+    workers = workers or os.cpu_count()
+    totals = {'games': 0, 'positions': 0, 'blunders': 0, 'errors': 0, 'nodes': 0}
+    start = time.perf_counter()
+
+    def finish(future):
+        game, summary = future.result()
+        pdn.write_game(output, game)
+        totals['games'] += 1
+        totals['positions'] += summary['positions']
+        totals['blunders'] += summary['blunders']
+        totals['nodes'] += summary['stats']['nodes']
+        if summary['error'] is not None:
+            totals['errors'] += 1
+            if log is not None:
+                print('game %d: %s' % (totals['games'], summary['error']), file=log)
+        if log is not None and totals['games'] % 100 == 0:
+            print('%d games, %d positions, %.0f positions/s' % (
+                totals['games'], totals['positions'], totals['positions'] / (time.perf_counter() - start)), file=log)
+
+    with ProcessPoolExecutor(workers) as executor:
+        # games in reading order, at most two per worker read ahead
+        pending = deque()
+        for game in pdn.read_games(source):
+            pending.append(executor.submit(analyze_game, game, engine, blunder))
+            if len(pending) >= 2 * workers:
+                finish(pending.popleft())
+        while pending:
+            finish(pending.popleft())
+    totals['time'] = time.perf_counter() - start
+    return totals
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Annotate the moves of PDN games with engine scores')
+    parser.add_argument('games', help='PDN file (- for stdin)')
+    parser.add_argument('--engine', default='iterative_deepening:time=200',
+                        help='engine spec, e.g. alpha_beta:depth=6,heuristic=3 (%s)' % ', '.join(ENGINES))
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--blunder', type=float, default=1, help='score lost by a move to mark it as a blunder')
+    parser.add_argument('--out', default='-', help='PDN file to write the annotated games to (- for stdout)')
+    args = parser.parse_args()
+    try:
+        name = parse_engine(args.engine)[0]
+    except argparse.ArgumentTypeError as error:
+        parser.error(str(error))
+    if name not in ENGINES:
+        parser.error('%s gives no scores, analyze with one of %s' % (name, ', '.join(ENGINES)))
+
+    source = sys.stdin if args.games == '-' else open(args.games)
+    out = sys.stdout if args.out == '-' else open(args.out, 'w')
+    try:
+        totals = run(source, out, args.engine, args.workers, args.blunder, log=sys.stderr)
+    finally:
+        for file in (source, out):
+            if file not in (sys.stdin, sys.stdout):
+                file.close()
+    print('%d games, %d positions in %.1fs (%.0f positions/s), %d blunders, %d games with errors' % (
+        totals['games'], totals['positions'], totals['time'], totals['positions'] / max(totals['time'], 1e-9),
+        totals['blunders'], totals['errors']), file=sys.stderr)
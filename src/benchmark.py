@@ -0,0 +1,211 @@
+"""
+Benchmarks of move generation, evaluation and search on a fixed set of positions.
+
+    python benchmark.py --out baseline.json
+    python benchmark.py --compare baseline.json
+
+Results are written as JSON. With --compare, every rate that dropped (or time that grew) by more than the threshold
+against the saved results is reported as a regression and the exit status is 1, as is any change of a move count.
+Changes of less than --noise seconds are never regressions, as the shortest benchmarks vary more than that from run
+to run. The NumPy batch evaluation is measured when NumPy is installed.
+"""
+from checkers.board import Board
+from checkers.constants import WHITE, BLACK
+from checkers import bitboard, simulation
+from checkers.perft import perft
+from minimax.minimax import minimax
+from minimax.alpha_beta import AlphaBeta
+from minimax.transposition import TranspositionTable
+from monte_carlo.monte_carlo_tree_search import MCTS
+import argparse
+import platform
+import random
+import json
+import time
+import sys
+
+try:
+    from checkers import batch_eval
+except ImportError:
+    batch_eval = None
+
+
+def position(white=(), black=(), white_kings=(), black_kings=()):
+    """
+    Build a board from lists of (row, col)
+    :return: Board
+    """
+    masks = [0, 0, 0]
+    for squares, side, king in ((white, 0, False), (black, 1, False), (white_kings, 0, True), (black_kings, 1, True)):
+        for row, col in squares:
+            bit = bitboard.square(row, col)
+            masks[side] |= bit
+            if king:
+                masks[2] |= bit
+    return Board.unpack(tuple(masks))
+
+
+# name -> (board, color to move)
+POSITIONS = {
+    'opening': (Board(), BLACK),
+    'middlegame': (position(white=[(0, 1), (0, 5), (1, 2), (1, 6), (2, 1), (2, 3), (3, 4), (3, 6)],
+                            black=[(4, 3), (4, 5), (5, 0), (5, 2), (5, 6), (6, 1), (6, 5), (7, 2), (7, 6)]), WHITE),
+    'king_endgame': (position(white=[(1, 0)], white_kings=[(2, 3), (5, 2)], black_kings=[(3, 6), (6, 5)]), BLACK),
+    'multi_jump': (position(white=[(0, 1), (0, 7), (2, 1), (2, 3), (4, 3), (6, 3)],
+                            black=[(6, 7), (7, 2), (7, 6)], white_kings=[(3, 6)]), BLACK),
+}
+
+# depths per benchmark, full run and --quick run
+DEPTHS = {
+    'perft': (6, 4),
+    'minimax': (4, 3),
+    'alpha_beta': (7, 4),
+}
+MCTS_ITERATIONS = (2000, 300)
+EVAL_ROUNDS = (2000, 200)
+
+
+def _best_of(repeat, function, setup=None):
+    """
+    Run function repeat times
+    :param setup: function called before every run, outside the timing
+    :return: (its last result, the fastest time in seconds)
+    """
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def run(quick=False, repeat=3):
+    """
+    Run every benchmark
+    :param quick: smaller depths and counts
+    :param repeat: runs of each benchmark, the fastest one is kept
+    :return: {benchmark name: {metric: value}}
+    """
+    size = 1 if quick else 0
+    results = {}
+
+    for name, (board, color) in POSITIONS.items():
+        depth = DEPTHS['perft'][size]
+        nodes, seconds = _best_of(repeat, lambda: perft(board.copy(), depth, color))
+        results['perft/%s/%d' % (name, depth)] = {'nodes': nodes, 'seconds': seconds, 'nodes_per_second': nodes / seconds}
+
+    boards = [board for board, _ in POSITIONS.values()]
+    rounds = EVAL_ROUNDS[size]
+    for heuristic in (1, 2, 3):
+        for color, color_name in ((WHITE, 'white'), (BLACK, 'black')):
+            evaluate = simulation.get_heuristic(heuristic, color)
+            _, seconds = _best_of(repeat, lambda: [evaluate(board) for _ in range(rounds) for board in boards])
+            results['eval/%s_heuristic_eval_%d' % (color_name, heuristic)] = {
+                'seconds': seconds, 'evals_per_second': rounds * len(boards) / seconds}
+    if batch_eval is not None:
+        batch = [board for _ in range(rounds) for board in boards]
+        squares, seconds = _best_of(repeat, lambda: batch_eval.encode(batch))
+        results['batch_eval/encode'] = {'seconds': seconds, 'boards_per_second': len(batch) / seconds}
+        for heuristic in (1, 2, 3):
+            _, seconds = _best_of(repeat, lambda: batch_eval.evaluate(squares, heuristic, WHITE))
+            results['batch_eval/heuristic_%d' % heuristic] = {'seconds': seconds,
+                                                              'evals_per_second': len(batch) / seconds}
+
+    # one table for every search, cleared before each run so no run starts with the entries of another
+    tt = TranspositionTable()
+
+    for name, (board, color) in POSITIONS.items():
+        other = BLACK if color == WHITE else WHITE
+        for depth in range(1, DEPTHS['minimax'][size] + 1):
+            _, seconds = _best_of(repeat, lambda: minimax(board, depth, True, None, 3, color, other))
+            results['minimax/%s/%d' % (name, depth)] = {'seconds': seconds}
+        for depth in range(1, DEPTHS['alpha_beta'][size] + 1):
+            nodes, seconds = _best_of(repeat, lambda: _alpha_beta_nodes(board, depth, color, other, tt), tt.clear)
+            results['alpha_beta/%s/%d' % (name, depth)] = {'seconds': seconds, 'searched': nodes,
+                                                           'nodes_per_second': nodes / seconds}
+
+    iterations = MCTS_ITERATIONS[size]
+    for name, (board, color) in POSITIONS.items():
+        random.seed(0)
+        _, seconds = _best_of(repeat, lambda: MCTS().search(board, color, 10, iterations))
+        results['mcts/%s' % name] = {'seconds': seconds, 'iterations_per_second': iterations / seconds}
+
+    return results
+
+
+def _alpha_beta_nodes(board, depth, color, other, tt):
+    """
+    Search board with AlphaBeta and heuristic 3 on the table tt
+    :return: nodes searched
+    """
+    search = AlphaBeta(3, color, other, tt)
+    search.search(board.copy(), depth, True, float('-inf'), float('inf'))
+    return search.stats.nodes
+
+
+def compare(results, baseline, threshold=0.1, noise=0.002):
+    """
+    Compare results with saved ones
+    :param results: run() results
+    :param baseline: saved run() results
+    :param threshold: relative slowdown allowed
+    :param noise: seconds a benchmark may slow down by whatever the threshold
+    :return: list of regression messages
+    """
+    regressions = []
+    for name, metrics in sorted(results.items()):
+        if name not in baseline:
+            continue
+        old = baseline[name]
+        if 'nodes' in metrics and metrics['nodes'] != old.get('nodes'):
+            regressions.append('%s: %s nodes, was %s' % (name, metrics['nodes'], old.get('nodes')))
+        if old.get('seconds') is not None and metrics['seconds'] - old['seconds'] < noise:
+            continue
+        # rates when the benchmark has one, otherwise its time
+        for metric in [metric for metric in metrics if metric.endswith('_per_second')] or ['seconds']:
+            if not old.get(metric) or not metrics[metric]:
+                continue
+            if metric == 'seconds':
+                slowdown = metrics[metric] / old[metric] - 1
+            else:
+                slowdown = old[metric] / metrics[metric] - 1
+            if slowdown > threshold:
+                regressions.append('%s: %s %.4g, was %.4g (%.1f%% slower)' % (name, metric, metrics[metric],
+                                                                             old[metric], 100 * slowdown))
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark move generation, evaluation and search')
+    parser.add_argument('--quick', action='store_true', help='smaller depths and counts')
+    parser.add_argument('--repeat', type=int, default=3, help='runs of each benchmark, the fastest is kept')
+    parser.add_argument('--out', help='file to write the JSON results to (stdout if not given)')
+    parser.add_argument('--compare', help='JSON results of an earlier run to check for regressions')
+    parser.add_argument('--threshold', type=float, default=0.1, help='relative slowdown counted as a regression')
+    parser.add_argument('--noise', type=float, default=0.002, help='slowdown in seconds never counted as a regression')
+    args = parser.parse_args()
+
+    report = {'python': platform.python_version(), 'machine': platform.machine(), 'quick': args.quick,
+              'results': run(args.quick, args.repeat)}
+    if args.out:
+        with open(args.out, 'w') as file:
+            json.dump(report, file, indent=1, sort_keys=True)
+    else:
+        json.dump(report, sys.stdout, indent=1, sort_keys=True)
+        print()
+
+    if args.compare:
+        with open(args.compare) as file:
+            saved = json.load(file)
+        if saved.get('quick') != args.quick:
+            print('warning: comparing a %s run with a %s run' % ('quick' if args.quick else 'full',
+                                                                 'quick' if saved.get('quick') else 'full'),
+                  file=sys.stderr)
+        found = compare(report['results'], saved['results'], args.threshold, args.noise)
+        for message in found:
+            print('REGRESSION ' + message, file=sys.stderr)
+        print('%d regression(s)' % len(found), file=sys.stderr)
+        sys.exit(1 if found else 0)
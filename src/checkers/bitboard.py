@@ -0,0 +1,193 @@
+"""
+Bitboard helpers for the 32 playable squares of the 8x8 board.
+A playable square (row, col) maps to index row * 4 + col // 2 and to the bit 1 << index,
+so a whole side of the board fits in a single 32-bit mask.
+"""
+from .constants import ROWS, COLS
+
+FULL = 0xFFFFFFFF
+ROW_MASKS = [0xF << (4 * row) for row in range(ROWS)]
+EVEN_ROWS = ROW_MASKS[0] | ROW_MASKS[2] | ROW_MASKS[4] | ROW_MASKS[6]
+ODD_ROWS = FULL ^ EVEN_ROWS
+# column 0 only holds squares on odd rows, column 7 only squares on even rows
+LEFT_EDGE = 0x11111111 & ODD_ROWS
+RIGHT_EDGE = 0x88888888 & EVEN_ROWS
+PROMOTION_ROWS = ROW_MASKS[0] | ROW_MASKS[ROWS - 1]
+
+WHITE_START = ROW_MASKS[0] | ROW_MASKS[1] | ROW_MASKS[2]
+BLACK_START = ROW_MASKS[5] | ROW_MASKS[6] | ROW_MASKS[7]
+
+
+def up_left(mask):
+    return ((mask & EVEN_ROWS) >> 4) | ((mask & ODD_ROWS & ~LEFT_EDGE) >> 5)
+
+
+def up_right(mask):
+    return ((mask & EVEN_ROWS & ~RIGHT_EDGE) >> 3) | ((mask & ODD_ROWS) >> 4)
+
+
+def down_left(mask):
+    return (((mask & EVEN_ROWS) << 4) | ((mask & ODD_ROWS & ~LEFT_EDGE) << 3)) & FULL
+
+
+def down_right(mask):
+    return (((mask & EVEN_ROWS & ~RIGHT_EDGE) << 5) | ((mask & ODD_ROWS) << 4)) & FULL
+
+
+# (left, right) shift pairs for each vertical direction, in the order the moves are searched
+UP = (up_left, up_right)
+DOWN = (down_left, down_right)
+# every shift paired with the shift that undoes it
+INVERSE = {up_left: down_right, up_right: down_left, down_left: up_right, down_right: up_left}
+
+
+def _diagonals(shifts):
+    """
+    :param shifts: UP or DOWN
+    :return: {square bit -> ((neighbour, landing) on the left diagonal, (neighbour, landing) on the right diagonal)},
+    a bit is 0 where the diagonal leaves the board
+    """
+    return {1 << index: tuple((shift(1 << index), shift(shift(1 << index))) for shift in shifts) for index in range(32)}
+
+
+# neighbours and jump landings of every square, for each vertical direction
+UP_DIAGONALS = _diagonals(UP)
+DOWN_DIAGONALS = _diagonals(DOWN)
+
+
+def square(row, col):
+    """
+    Bit of a board position
+    :param row: row of the square
+    :param col: column of the square
+    :return: bit of the square or 0 if the square is not playable
+    """
+    if 0 <= row < ROWS and 0 <= col < COLS and (row + col) % 2 == 1:
+        return 1 << (row * 4 + col // 2)
+    return 0
+
+
+def row_col(bit):
+    """
+    Board position of a single bit
+    :param bit: bit of a playable square
+    :return: (row, col)
+    """
+    index = bit.bit_length() - 1
+    row = index >> 2
+    return row, 2 * (index & 3) + (1 - row % 2)
+
+
+def iter_bits(mask):
+    """
+    Yield every set bit of a mask from the lowest square to the highest (board scan order)
+    :param mask: bitboard
+    """
+    while mask:
+        bit = mask & -mask
+        yield bit
+        mask ^= bit
+
+
+_POPCOUNT = [bin(i).count('1') for i in range(256)]
+
+
+def popcount(mask):
+    return (_POPCOUNT[mask & 0xFF] + _POPCOUNT[(mask >> 8) & 0xFF] +
+            _POPCOUNT[(mask >> 16) & 0xFF] + _POPCOUNT[mask >> 24])
+
+
+def _subsets(byte):
+    """
+    :return: every subset of the bits of byte, the one made of the bits chosen by i at index i
+    """
+    bits = [1 << index for index in range(8) if byte >> index & 1]
+    return [sum(bit for number, bit in enumerate(bits) if i >> number & 1) for i in range(1 << len(bits))]
+
+
+# by mask byte: its subsets in order (deposit) and {subset: number of the subset} (extract)
+_DEPOSIT = [_subsets(byte) for byte in range(256)]
+_EXTRACT = [{subset: i for i, subset in enumerate(subsets)} for subsets in _DEPOSIT]
+
+
+def extract(value, mask):
+    """
+    Gather the bits of value under mask into the low bits, in square order
+    :param value: bitboard, a subset of mask
+    :param mask: bitboard
+    :return: number with bit i set when the i-th set square of mask is set in value
+    """
+    result = shift = 0
+    for byte in range(0, 32, 8):
+        result |= _EXTRACT[mask >> byte & 0xFF][value >> byte & 0xFF] << shift
+        shift += _POPCOUNT[mask >> byte & 0xFF]
+    return result
+
+
+def deposit(bits, mask):
+    """
+    Scatter the low bits of bits onto the set squares of mask, the inverse of extract
+    :param bits: number with a bit for each set square of mask
+    :param mask: bitboard
+    :return: bitboard, a subset of mask
+    """
+    result = 0
+    for byte in range(0, 32, 8):
+        subsets = _DEPOSIT[mask >> byte & 0xFF]
+        result |= subsets[bits & len(subsets) - 1] << byte
+        bits >>= _POPCOUNT[mask >> byte & 0xFF]
+    return result
+
+
+def row_table(weights):
+    """
+    Build lookup tables scoring a mask by a weight per row, one table for each byte (two rows) of the mask
+    :param weights: score of a piece on each row
+    :return: four 256 entry tables
+    """
+    tables = []
+    for byte in range(4):
+        low, high = weights[2 * byte], weights[2 * byte + 1]
+        tables.append([low * _POPCOUNT[i & 0xF] + high * _POPCOUNT[i >> 4] for i in range(256)])
+    return tables
+
+
+def square_table(weights):
+    """
+    :param weights: score of a piece on each row
+    :return: {square bit: weight of its row}, for updating a score one square at a time
+    """
+    return {1 << index: weights[index >> 2] for index in range(32)}
+
+
+def row_score(mask, tables):
+    """
+    Score a mask with tables from row_table
+    :param mask: bitboard
+    :param tables: row_table(weights)
+    :return: sum of the row weight of every set bit
+    """
+    return (tables[0][mask & 0xFF] + tables[1][(mask >> 8) & 0xFF] +
+            tables[2][(mask >> 16) & 0xFF] + tables[3][mask >> 24])
+
+
+def movable(pieces, kings, opponent, empty, forward):
+    """
+    Pieces with at least one simple move or jump available
+    :param pieces: pieces of the side to check
+    :param kings: kings of the whole board
+    :param opponent: pieces of the other side
+    :param empty: empty squares
+    :param forward: UP or DOWN, the direction the side's men move in
+    :return: mask of the pieces that can move
+    """
+    backward = DOWN if forward is UP else UP
+    result = 0
+    for shifts, movers in ((forward, pieces), (backward, pieces & kings)):
+        if not movers:
+            continue
+        for shift in shifts:
+            back = INVERSE[shift]
+            result |= back(shift(movers) & empty)
+            result |= back(back(shift(shift(movers) & opponent) & empty))
+    return result
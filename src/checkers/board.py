@@ -1,137 +1,125 @@
-from .constants import BLACK, ROWS, COLS, SQUARE_SIZE, WHITE, DARK_BEIGE, LIGHT_BEIGE
+from .constants import BLACK, WHITE, DRAW
 from .piece import Piece
-import pygame
-import math
-import random
+from .move import Move
+from . import bitboard, zobrist
+
+# row weights of men for the positional heuristics (white_heuristic_eval_3 / black_heuristic_eval_3)
+WHITE_EVAL_WHITE_ROWS = [0, 2, 3, 4, 6, 7, 8, 9]
+WHITE_EVAL_BLACK_ROWS = [-10, -9, -8, -7, -5, -4, -3, -2]
+BLACK_EVAL_BLACK_ROWS = [9, 8, 7, 6, 4, 3, 2, 1]
+BLACK_EVAL_WHITE_ROWS = [-2, -3, -4, -5, -6, -7, -9, -10]
+# score of a king that can move and of a trapped king
+KING_SCORE = 21
+TRAPPED_KING_SCORE = -100
+# search scores of finished games: a win less its distance in moves (quicker wins score higher), and a draw
+WIN_SCORE = 10000
+DRAW_SCORE = 0
+# moves in a row without a capture or a man move after which the game is a draw (40 moves of each side)
+NO_PROGRESS_PLIES = 80
+# bytes of Board.to_bytes: occupied squares (32 bits), the color (24 bits, 1 for black) and king (24 bits) flags of
+# the pieces in square order, the side to move (1 bit, 1 for black) and the quiet moves (7 bits), little-endian
+POSITION_SIZE = 12
+
+WHITE_EVAL_WHITE_MEN = bitboard.row_table(WHITE_EVAL_WHITE_ROWS)
+WHITE_EVAL_BLACK_MEN = bitboard.row_table(WHITE_EVAL_BLACK_ROWS)
+BLACK_EVAL_BLACK_MEN = bitboard.row_table(BLACK_EVAL_BLACK_ROWS)
+BLACK_EVAL_WHITE_MEN = bitboard.row_table(BLACK_EVAL_WHITE_ROWS)
+# the same weights by square, for the men scores Board keeps up to date as pieces move
+WHITE_EVAL_WHITE_SQUARES = bitboard.square_table(WHITE_EVAL_WHITE_ROWS)
+WHITE_EVAL_BLACK_SQUARES = bitboard.square_table(WHITE_EVAL_BLACK_ROWS)
+BLACK_EVAL_BLACK_SQUARES = bitboard.square_table(BLACK_EVAL_BLACK_ROWS)
+BLACK_EVAL_WHITE_SQUARES = bitboard.square_table(BLACK_EVAL_WHITE_ROWS)
+
+# diagonal tables a piece moves along: men forward only, kings up then down
+MAN_DIAGONALS = {WHITE: (bitboard.DOWN_DIAGONALS,), BLACK: (bitboard.UP_DIAGONALS,)}
+KING_DIAGONALS = (bitboard.UP_DIAGONALS, bitboard.DOWN_DIAGONALS)
 
 
 class Board:
     def __init__(self):
-        self.board = []
+        self.white = 0
+        self.black = 0
+        self.kings = 0
+        self.hash = 0
         self.selected_piece = None
         self.black_left = self.white_left = 12
         self.black_kings = 0
         self.white_kings = 0
-        self.score = 0
-        self.visits = 0
-        self.parent = None
-        self.parent_action = None
-        self.children = []
+        # row score of all men for white_heuristic_eval_3 and for black_heuristic_eval_3
+        self.white_men_score = self.black_men_score = 0
+        # moves since the last capture or man move, and the hash of the position before every move
+        self.quiet = 0
+        self.history = []
         self.create_board()
 
-    def reset_mcts(self):
+    def draw_board(self, window):
         """
-        Reset all variables relevant to Monte Carlo Tree Search
+        Create the initial 8x8 board visual in the game window
+        :param window: pygame display window (800x800 pixels)
         """
-        self.parent = None
-        self.score = 0
-        self.visits = 0
-        self.parent = None
-        self.parent_action = None
-        self.children = []
-
-    def set_parent(self, board):
-        self.parent = board
-
-    def get_parent(self):
-        return self.parent
-
-    def increment_visit(self):
-        self.visits += 1
-
-    def add_to_total_score(self, score):
-        self.score += score
-
-    def add_children(self, children):
-        for c in children:
-            c.set_parent(self)
-        self.children.extend(children)
-
-    def get_children_len(self):
-        return self.children.__len__()
-
-    def get_children(self):
-        return self.children
-
-    def get_average_score(self):
-        return self.score // self.visits
+        from . import render
+        render.draw_squares(window)
 
-    def get_score(self):
-        return self.score
-
-    def get_visits(self):
-        return self.visits
+    def create_board(self):
+        """
+        Initialize the bitboards with the legal starting positions for checkers
+        (white on the top three rows, black on the bottom three)
+        """
+        self.set_position(bitboard.WHITE_START, bitboard.BLACK_START, 0)
 
-    def get_best_child(self, searches):
+    def set_position(self, white, black, kings):
         """
-        Get child with best score. (Monte Carlo Tree Search)
-        UCB = (Average_Score) + (2 * sqrt((ln(N) / visits)
-        :param searches: N
-        :return: Child with best score
+        Put pieces on the board and compute the counts, scores and hash that moves keep up to date
+        :param white: white pieces bitboard
+        :param black: black pieces bitboard
+        :param kings: kings bitboard (both colors)
         """
-        if self.children.__len__() == 0:
-            return None
-        best = float('-inf')
-        best_child = None
-        all_zero = True
-        for c in self.children:
-            all_zero = False
-            if c.get_visits() == 0:
-                best = float('inf')
-                best_child = c
-            else:
-                ln = math.log(searches)
-                ucb = c.get_average_score() + (2 * math.sqrt((ln / c.get_visits())))
-                best = max(best, ucb)
-                if best > 0:
-                    all_zero = False
-                if best == ucb:
-                    best_child = c
-        if all_zero:
-            return random.choice(self.children)
-        return best_child
+        self.white, self.black, self.kings = white, black, kings
+        self.white_left = bitboard.popcount(white)
+        self.black_left = bitboard.popcount(black)
+        self.white_kings = bitboard.popcount(white & kings)
+        self.black_kings = bitboard.popcount(black & kings)
+        self.white_men_score = (bitboard.row_score(white & ~kings, WHITE_EVAL_WHITE_MEN) +
+                                bitboard.row_score(black & ~kings, WHITE_EVAL_BLACK_MEN))
+        self.black_men_score = (bitboard.row_score(black & ~kings, BLACK_EVAL_BLACK_MEN) +
+                                bitboard.row_score(white & ~kings, BLACK_EVAL_WHITE_MEN))
+        self.hash = zobrist.hash_position(white, black, kings)
 
-    def draw_board(self, window):
+    def draw(self, window):
         """
-        Create the initial 8x8 board visual in the game window
+        Create the initial 8x8 board visual and pieces in the game window
+        Pieces are drawn through Piece objects built from the bitboards
         :param window: pygame display window (800x800 pixels)
         """
-        window.fill(DARK_BEIGE)
-        for row in range(ROWS):
-            for col in range(row % 2, COLS, 2):
-                pygame.draw.rect(window, LIGHT_BEIGE, (row * SQUARE_SIZE, col * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE))
+        from . import render
+        render.draw_board(window, self)
 
-    def create_board(self):
+    def _masks(self, color):
+        """
+        :param color: color of the side
+        :return: (pieces of color, pieces of the other color)
         """
-        Initialize board array (2D) with empty spaces represented by 0 otherwise a new piece
-        Adhering to legal starting positions for checkers
-        """
-        for row in range(ROWS):
-            self.board.append([])
-            for col in range(COLS):
-                if col % 2 == ((row + 1) % 2):
-                    if row < 3:
-                        piece = Piece(row, col, WHITE)
-                        self.board[row].append(piece)
-                    elif row > 4:
-                        piece = Piece(row, col, BLACK)
-                        self.board[row].append(piece)
-                    else:
-                        self.board[row].append(0)
-                else:
-                    self.board[row].append(0)
+        if color == WHITE:
+            return self.white, self.black
+        return self.black, self.white
 
-    def draw(self, window):
+    def _piece(self, bit):
         """
-        Create the initial 8x8 board visual and pieces in the game window
-        :param window: pygame display window (800x800 pixels)
+        Build a Piece object for an occupied square
+        :param bit: bit of the square
+        :return: Piece, or 0 if the square is empty
         """
-        self.draw_board(window)
-        for row in range(ROWS):
-            for col in range(COLS):
-                piece = self.board[row][col]
-                if piece != 0:
-                    piece.draw(window)
+        if self.white & bit:
+            color = WHITE
+        elif self.black & bit:
+            color = BLACK
+        else:
+            return 0
+        row, col = bitboard.row_col(bit)
+        piece = Piece(row, col, color)
+        if self.kings & bit:
+            piece.make_king()
+        return piece
 
     def white_heuristic_eval_1(self):
         """
@@ -150,32 +138,12 @@ class Board:
     def white_heuristic_eval_3(self):
         """
         Heuristic evaluation focusing on overall piece count, number of kings, and positioning on the board
+        Men are scored as they move, only trapped kings are looked for here
         :return: Heuristic evaluation
         """
-        score = 0
-        for row in self.board:
-            for piece in row:
-                if piece != 0 and piece.color == WHITE:
-                    if not piece.king:
-                        if piece.row > 3:
-                            score += 2 + piece.row
-                        elif piece.row == 0:
-                            score += 0
-                        else:
-                            score += 1 + piece.row
-                    else:
-                        if self.get_valid_moves(piece).__len__() == 0:
-                            score -= 100
-                        else:
-                            score += 21
-                if piece != 0 and piece.color == BLACK:
-                    if not piece.king:
-                        if piece.row < 4:
-                            score -= 3 + (7 - piece.row)
-                        else:
-                            score -= 2 + (7 - piece.row)
-                    else:
-                        score -= 21
+        score = self.white_men_score + KING_SCORE * (self.white_kings - self.black_kings)
+        if self.white_kings:
+            score += (TRAPPED_KING_SCORE - KING_SCORE) * self._trapped_kings(self.white, self.black, bitboard.DOWN)
         return score
 
     def black_heuristic_eval_1(self):
@@ -195,100 +163,136 @@ class Board:
     def black_heuristic_eval_3(self):
         """
         Heuristic evaluation focusing on overall piece count, number of kings, and positioning on the board
+        Men are scored as they move, only trapped kings are looked for here
         :return: Heuristic evaluation
         """
-        score = 0
-        for row in self.board:
-            for piece in row:
-                if piece != 0 and piece.color == BLACK:
-                    if not piece.king:
-                        if piece.row < 4:
-                            score += 2 + (7 - piece.row)
-
-                        else:
-                            score += 1 + (7 - piece.row)
-                    else:
-                        if self.get_valid_moves(piece).__len__() == 0:
-                            score -= 100
-                        else:
-                            score += 21
-                if piece != 0 and piece.color == WHITE:
-                    if not piece.king:
-                        if piece.row > 5:
-                            score -= 3 + piece.row
-                        else:
-                            score -= 2 + piece.row
-                    else:
-                        score -= 21
+        score = self.black_men_score + KING_SCORE * (self.black_kings - self.white_kings)
+        if self.black_kings:
+            score += (TRAPPED_KING_SCORE - KING_SCORE) * self._trapped_kings(self.black, self.white, bitboard.UP)
         return score
 
+    def _trapped_kings(self, own, opponent, forward):
+        """
+        Count own kings without a move for the positional heuristics (scored TRAPPED_KING_SCORE, not KING_SCORE)
+        :param own: pieces of the evaluating side
+        :param opponent: pieces of the other side
+        :param forward: direction the evaluating side's men move in
+        :return: number of trapped kings
+        """
+        own_kings = own & self.kings
+        empty = bitboard.FULL & ~(own | opponent)
+        return bitboard.popcount(own_kings & ~bitboard.movable(own_kings, self.kings, opponent, empty, forward))
+
     def get_all_pieces(self, color):
         """
-        Find all pieces in the board array of certain color
+        Find all pieces in the board of certain color
         :param color: Color of wanted pieces
         :return: All pieces of color
         """
-        pieces = []
-        for row in self.board:
-            for piece in row:
-                if piece != 0 and piece.color == color:
-                    pieces.append(piece)
-        return pieces
+        own, _ = self._masks(color)
+        return [self._piece(bit) for bit in bitboard.iter_bits(own)]
 
     def get_all_pieces_move(self, color):
         """
-        Find all pieces in the board array of certain color and have at least one valid move
+        Find all pieces in the board of certain color and have at least one valid move
         (not blocked)
         :param color: Color of wanted pieces
         :return: All pieces of color and have at least one available move
         """
-        pieces = []
-        for row in self.board:
-            for piece in row:
-                if piece != 0 and piece.color == color and self.get_valid_moves(piece).__len__() > 0:
-                    pieces.append(piece)
-        return pieces
+        own, opponent = self._masks(color)
+        empty = bitboard.FULL & ~(own | opponent)
+        forward = bitboard.DOWN if color == WHITE else bitboard.UP
+        movers = bitboard.movable(own, self.kings, opponent, empty, forward)
+        return [self._piece(bit) for bit in bitboard.iter_bits(movers)]
 
     def move(self, piece, row, col):
         """
-        Move selected piece within our board array to a new index
+        Move selected piece within our bitboards to a new square
         If move results in a king (piece meeting row 0 or ROW and is corresponding color)
         make piece a king and add to our king count
         :param piece: piece to move
         :param row: new row position
         :param col: new column position
         """
-        self.board[piece.row][piece.col], self.board[row][col] = self.board[row][col], self.board[piece.row][piece.col]
+        start = bitboard.square(piece.row, piece.col)
+        self.history.append(self.hash)
+        self.quiet = self.quiet + 1 if self.kings & start else 0
+        if self._move_bits(start, bitboard.square(row, col)):
+            piece.make_king()
         piece.move(row, col)
 
-        if row == ROWS - 1 or row == 0:
-            if piece.color == WHITE and not piece.king:
+    def _move_bits(self, start, end):
+        """
+        Move the piece on square start to square end, crowning it on the first or last row
+        Keeps the Zobrist hash and the men scores up to date
+        :param start: bit of the occupied square
+        :param end: bit of the destination square
+        :return: True if the piece was made a king
+        """
+        if self.white & start:
+            self.white ^= start | end
+            men, kings = zobrist.WHITE_MAN, zobrist.WHITE_KING
+            white_squares, black_squares = WHITE_EVAL_WHITE_SQUARES, BLACK_EVAL_WHITE_SQUARES
+        else:
+            self.black ^= start | end
+            men, kings = zobrist.BLACK_MAN, zobrist.BLACK_KING
+            white_squares, black_squares = WHITE_EVAL_BLACK_SQUARES, BLACK_EVAL_BLACK_SQUARES
+
+        if self.kings & start:
+            self.kings ^= start | end
+            self.hash ^= kings[start] ^ kings[end]
+        elif end & bitboard.PROMOTION_ROWS:
+            self.kings |= end
+            self.hash ^= men[start] ^ kings[end]
+            self.white_men_score -= white_squares[start]
+            self.black_men_score -= black_squares[start]
+            if men is zobrist.WHITE_MAN:
                 self.white_kings += 1
-                piece.make_king()
-            elif piece.color == BLACK and not piece.king:
+            else:
                 self.black_kings += 1
-                piece.make_king()
+            return True
+        else:
+            self.hash ^= men[start] ^ men[end]
+            self.white_men_score += white_squares[end] - white_squares[start]
+            self.black_men_score += black_squares[end] - black_squares[start]
+        return False
 
     def remove(self, pieces):
         """
-        Remove piece or pieces from board array and update counts
+        Remove piece or pieces from the bitboards and update counts
         :param pieces: piece or pieces to be removed
         """
+        mask = 0
         for piece in pieces:
-            self.board[piece.row][piece.col] = 0
-            if piece != 0:
-                if piece.color == BLACK:
-                    if piece.king:
-                        self.black_left -= 1
-                        self.black_kings -= 1
-                    else:
-                        self.black_left -= 1
-                else:
-                    if piece.king:
-                        self.white_left -= 1
-                        self.white_kings -= 1
-                    else:
-                        self.white_left -= 1
+            mask |= bitboard.square(piece.row, piece.col)
+        self._remove_bits(mask)
+        self.quiet = 0
+
+    def _remove_bits(self, mask):
+        """
+        Clear every square of mask and update counts, men scores and the Zobrist hash
+        :param mask: squares to clear
+        """
+        white = self.white & mask
+        black = self.black & mask
+        for bit in bitboard.iter_bits(white | black):
+            if self.kings & bit:
+                self.hash ^= zobrist.WHITE_KING[bit] if white & bit else zobrist.BLACK_KING[bit]
+            elif white & bit:
+                self.hash ^= zobrist.WHITE_MAN[bit]
+                self.white_men_score -= WHITE_EVAL_WHITE_SQUARES[bit]
+                self.black_men_score -= BLACK_EVAL_WHITE_SQUARES[bit]
+            else:
+                self.hash ^= zobrist.BLACK_MAN[bit]
+                self.white_men_score -= WHITE_EVAL_BLACK_SQUARES[bit]
+                self.black_men_score -= BLACK_EVAL_BLACK_SQUARES[bit]
+        self.white_left -= bitboard.popcount(white)
+        self.white_kings -= bitboard.popcount(white & self.kings)
+        self.black_left -= bitboard.popcount(black)
+        self.black_kings -= bitboard.popcount(black & self.kings)
+        self.white &= ~mask
+        self.black &= ~mask
+        self.kings &= ~mask
 
     def winner(self):
         """
@@ -301,8 +305,49 @@ class Board:
             return BLACK
         return None
 
+    def is_draw(self, repetitions=1):
+        """
+        Check the draw rules: NO_PROGRESS_PLIES moves without a capture or a man move, or a repeated position.
+        Only the positions since the last capture or man move are compared, the ones before cannot come back,
+        so this is cheap enough for every node of a search
+        :param repetitions: earlier occurrences of the position with the same side to move that make a draw,
+        1 for searches, 2 for the threefold repetition rule of a game
+        :return: True if the position is a draw
+        """
+        quiet = self.quiet
+        if quiet >= NO_PROGRESS_PLIES:
+            return True
+        if quiet < 4:
+            return False
+        # the same side is to move every second position, and a position needs at least 4 moves to come back
+        return self.history[-4:-quiet - 1:-2].count(self.hash) >= repetitions
+
+    def has_moves(self, color):
+        """
+        :param color: color to move
+        :return: True if color has a legal move
+        """
+        return next(self.generate_moves(color), None) is not None
+
+    def result(self, color, repetitions=2):
+        """
+        Check if the game is over with color to move: a side with no pieces or no legal move has lost,
+        and the draw rules of is_draw
+        :param color: color to move
+        :param repetitions: earlier occurrences of the position that make a draw (see is_draw)
+        :return: color of the winner, DRAW, or None if the game goes on
+        """
+        winner = self.winner()
+        if winner is not None:
+            return winner
+        if not self.has_moves(color):
+            return BLACK if color == WHITE else WHITE
+        if self.is_draw(repetitions):
+            return DRAW
+        return None
+
     def get_piece(self, row, col):
-        return self.board[row][col]
+        return self._piece(bitboard.square(row, col))
 
     def get_valid_moves(self, piece):
         """
@@ -310,91 +355,226 @@ class Board:
         :param piece: piece to search
         :return: available moves for a piece {(row,col) -> []}
         """
+        bit = bitboard.square(piece.row, piece.col)
         moves = {}
-        left = piece.col - 1
-        right = piece.col + 1
-        row = piece.row
-
-        if piece.color == BLACK or piece.king:
-            moves.update(self._traverse_left(row - 1, max(row - 3, -1), -1, piece.color, left))
-            moves.update(self._traverse_right(row - 1, max(row - 3, -1), -1, piece.color, right))
-        if piece.color == WHITE or piece.king:
-            moves.update(self._traverse_left(row + 1, min(row + 3, ROWS), 1, piece.color, left))
-            moves.update(self._traverse_right(row + 1, min(row + 3, ROWS), 1, piece.color, right))
-
-        return moves
-
-    def _traverse_left(self, start, stop, step, color, left, skipped=[]):
-        moves = {}
-        last = []
-        for r in range(start, stop, step):
-            if left < 0:
-                break
-
-            current = self.board[r][left]
-            if current == 0:
-                if skipped and not last:
-                    break
-                elif skipped:
-                    moves[(r, left)] = last + skipped
-                else:
-                    moves[(r, left)] = last
-
-                if last:
-                    if step == -1:
-                        row = max(r - 3, -1)
-                    else:
-                        row = min(r + 3, ROWS)
-                    if skipped:
-                        moves.update(self._traverse_left(r + step, row, step, color, left - 1, skipped=last + skipped))
-                        moves.update(self._traverse_right(r + step, row, step, color, left + 1, skipped=last + skipped))
-                    else:
-                        moves.update(self._traverse_left(r + step, row, step, color, left - 1, skipped=last))
-                        moves.update(self._traverse_right(r + step, row, step, color, left + 1, skipped=last))
-                break
-            elif current.color == color:
-                break
-            else:
-                last = [current]
-
-            left -= 1
-
+        for end, captured in self._square_moves(bit, piece.color).items():
+            # the last piece jumped comes first: jumps keep one vertical direction, so it is the lowest square
+            # of the mask when moving up and the highest when moving down
+            skipped = [self._piece(b) for b in bitboard.iter_bits(captured)]
+            if end > bit:
+                skipped.reverse()
+            moves[bitboard.row_col(end)] = skipped
         return moves
 
-    def _traverse_right(self, start, stop, step, color, right, skipped=[]):
+    def generate_moves(self, color):
+        """
+        Generate every move of a color in board scan order without building Piece objects or boards.
+        The board may be changed with make_move while iterating as long as it is restored before the next move
+        :param color: color to move
+        :return: generator of Move
+        """
+        own, _ = self._masks(color)
+        for start in bitboard.iter_bits(own):
+            promotes = not self.kings & start
+            for end, captured in self._square_moves(start, color).items():
+                yield Move(start, end, captured, promotes and bool(end & bitboard.PROMOTION_ROWS))
+
+    def generate_captures(self, color):
+        """
+        Generate only the moves that jump over at least one piece
+        :param color: color to move
+        :return: generator of Move
+        """
+        own, opponent = self._masks(color)
+        empty = bitboard.FULL & ~(own | opponent)
+        jumpers = 0
+        for shifts, movers in self._movers(color, own):
+            for shift in shifts:
+                back = bitboard.INVERSE[shift]
+                jumpers |= back(back(shift(shift(movers) & opponent) & empty))
+
+        for start in bitboard.iter_bits(jumpers):
+            promotes = not self.kings & start
+            for end, captured in self._square_moves(start, color).items():
+                if captured:
+                    yield Move(start, end, captured, promotes and bool(end & bitboard.PROMOTION_ROWS))
+
+    def generate_quiet(self, color):
+        """
+        Generate only the single steps onto an empty square, straight from the bitboards
+        :param color: color to move
+        :return: generator of Move
+        """
+        own, opponent = self._masks(color)
+        empty = bitboard.FULL & ~(own | opponent)
+        for shifts, movers in self._movers(color, own):
+            for shift in shifts:
+                back = bitboard.INVERSE[shift]
+                for end in bitboard.iter_bits(shift(movers) & empty):
+                    start = back(end)
+                    yield Move(start, end, 0, not self.kings & start and bool(end & bitboard.PROMOTION_ROWS))
+
+    def is_legal(self, move, color):
+        """
+        Check a move that was generated for another position (transposition table, killer moves)
+        :param move: Move
+        :param color: color to move
+        :return: True if move can be played on this board
+        """
+        own, opponent = self._masks(color)
+        if not own & move.start or (own | opponent) & move.end:
+            return False
+        if move.captured:
+            return self._square_moves(move.start, color).get(move.end) == move.captured
+        for shifts, movers in self._movers(color, move.start):
+            for shift in shifts:
+                if shift(movers) == move.end:
+                    return True
+        return False
+
+    def _movers(self, color, pieces):
+        """
+        :param color: color of pieces
+        :param pieces: mask of pieces of color
+        :return: ((forward shifts, pieces), (backward shifts, kings of pieces))
+        """
+        forward, backward = (bitboard.DOWN, bitboard.UP) if color == WHITE else (bitboard.UP, bitboard.DOWN)
+        return (forward, pieces), (backward, pieces & self.kings)
+
+    def make_move(self, move):
+        """
+        Play a move in place
+        :param move: Move generated for this board
+        :return: undo token for unmake_move
+        """
+        undo = (self.white, self.black, self.kings, self.hash, self.white_left, self.black_left, self.white_kings,
+                self.black_kings, self.white_men_score, self.black_men_score, self.quiet)
+        self.history.append(self.hash)
+        self.quiet = 0 if move.captured or not self.kings & move.start else self.quiet + 1
+        self._move_bits(move.start, move.end)
+        if move.captured:
+            self._remove_bits(move.captured)
+        return undo
+
+    def unmake_move(self, undo):
+        """
+        Take back the move that returned the undo token
+        :param undo: token returned by make_move
+        """
+        (self.white, self.black, self.kings, self.hash, self.white_left, self.black_left, self.white_kings,
+         self.black_kings, self.white_men_score, self.black_men_score, self.quiet) = undo
+        self.history.pop()
+
+    def copy(self):
+        """
+        Copy the position
+        :return: new board
+        """
+        board = Board.__new__(Board)
+        board.white = self.white
+        board.black = self.black
+        board.kings = self.kings
+        board.hash = self.hash
+        board.selected_piece = None
+        board.black_left = self.black_left
+        board.white_left = self.white_left
+        board.black_kings = self.black_kings
+        board.white_kings = self.white_kings
+        board.white_men_score = self.white_men_score
+        board.black_men_score = self.black_men_score
+        board.quiet = self.quiet
+        # positions before the last capture or man move cannot repeat
+        board.history = self.history[max(0, len(self.history) - self.quiet):]
+        return board
+
+    def pack(self):
+        """
+        Compact form of the position for sending to other processes
+        :return: (white, black, kings) bitboards
+        """
+        return self.white, self.black, self.kings
+
+    @staticmethod
+    def unpack(position):
+        """
+        Build a board from Board.pack
+        :param position: (white, black, kings) bitboards
+        :return: new board
+        """
+        return Board._from_position(*position)
+
+    @staticmethod
+    def _from_position(white, black, kings, quiet=0):
+        """
+        New board holding a position, without setting up the starting position first
+        :return: new board
+        """
+        board = Board.__new__(Board)
+        board.selected_piece = None
+        board.quiet = quiet
+        board.history = []
+        board.set_position(white, black, kings)
+        return board
+
+    def to_bytes(self, color):
+        """
+        Canonical compact encoding of the position, for files and for sending to other processes. The same position,
+        side to move and quiet move count always give the same bytes; the history of earlier positions is not kept
+        :param color: color to move
+        :return: POSITION_SIZE bytes
+        """
+        occupied = self.white | self.black
+        code = (occupied | bitboard.extract(self.black, occupied) << 32 | bitboard.extract(self.kings, occupied) << 56 |
+                (color == BLACK) << 80 | min(self.quiet, NO_PROGRESS_PLIES) << 81)
+        return code.to_bytes(POSITION_SIZE, 'little')
+
+    @staticmethod
+    def from_bytes(data):
+        """
+        Build a board from Board.to_bytes
+        :param data: POSITION_SIZE bytes (bytes, bytearray or memoryview)
+        :return: (new board, color to move)
+        """
+        if len(data) != POSITION_SIZE:
+            raise ValueError('a position is %d bytes, got %d' % (POSITION_SIZE, len(data)))
+        code = int.from_bytes(data, 'little')
+        occupied = code & bitboard.FULL
+        # flags past the last piece, and the bits after the quiet moves, are always 0
+        unused = 0xFFFFFF >> bitboard.popcount(occupied) << bitboard.popcount(occupied)
+        if code >> 32 & unused or code >> 56 & unused or code >> 88 or bitboard.popcount(occupied) > 24:
+            raise ValueError('not a position encoded by Board.to_bytes: %s' % bytes(data).hex())
+        black = bitboard.deposit(code >> 32, occupied)
+        board = Board._from_position(occupied ^ black, black, bitboard.deposit(code >> 56, occupied), code >> 81 & 0x7F)
+        return board, (BLACK if code >> 80 & 1 else WHITE)
+
+    def _square_moves(self, bit, color):
+        """
+        Get all possible moves for the piece on a square: steps onto an empty diagonal neighbour, and jumps over an
+        opponent piece which then continue on both diagonals of the same vertical direction.
+        Walks the diagonal tables depth first, left diagonal before right, with a stack instead of recursion
+        :param bit: bit of the piece
+        :param color: color of the piece
+        :return: {end bit -> mask of captured pieces}
+        """
         moves = {}
-        last = []
-        for r in range(start, stop, step):
-            if right >= COLS:
-                break
-
-            current = self.board[r][right]
-            if current == 0:
-                if skipped and not last:
-                    break
-                elif skipped:
-                    moves[(r, right)] = last + skipped
-                else:
-                    moves[(r, right)] = last
-
-                if last:
-                    if step == -1:
-                        row = max(r - 3, -1)
-                    else:
-                        row = min(r + 3, ROWS)
-                    if skipped:
-                        moves.update(self._traverse_left(r + step, row, step, color, right - 1, skipped=last + skipped))
-                        moves.update(
-                            self._traverse_right(r + step, row, step, color, right + 1, skipped=last + skipped))
-                    else:
-                        moves.update(self._traverse_left(r + step, row, step, color, right - 1, skipped=last))
-                        moves.update(self._traverse_right(r + step, row, step, color, right + 1, skipped=last))
-                break
-            elif current.color == color:
-                break
-            else:
-                last = [current]
-
-            right += 1
+        own, opponent = self._masks(color)
+        empty = bitboard.FULL & ~(own | opponent)
+
+        stack = []
+        for diagonals in reversed(KING_DIAGONALS if self.kings & bit else MAN_DIAGONALS[color]):
+            left, right = diagonals[bit]
+            stack.append(right + (diagonals, 0))
+            stack.append(left + (diagonals, 0))
+        while stack:
+            neighbour, landing, diagonals, captured = stack.pop()
+            if neighbour & empty:
+                if not captured:
+                    moves[neighbour] = 0
+            elif neighbour & opponent and landing & empty:
+                captured |= neighbour
+                moves[landing] = captured
+                left, right = diagonals[landing]
+                stack.append(right + (diagonals, captured))
+                stack.append(left + (diagonals, captured))
 
         return moves
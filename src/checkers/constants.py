@@ -1,5 +1,3 @@
-import pygame
-
 #display constants
 WIDTH = 800
 HEIGHT = 800
@@ -10,12 +8,16 @@ SQUARE_SIZE = WIDTH//COLS
 RED = (255, 0, 0)
 GREEN = (0, 255, 0)
 BLUE = (0, 0, 255)
-BLACK = (45, 45, 45)
-WHITE = (255, 230, 220)
+BLACK_PIECE = (45, 45, 45)
+WHITE_PIECE = (255, 230, 220)
 GOLD = (255, 223, 0)
 GREY = (128, 128, 128)
 #DARK_BEIGE = (225, 198, 153)
 DARK_BEIGE = (173, 125, 89)
 LIGHT_BEIGE = (237, 212, 173)
 
-CROWN = pygame.transform.scale(pygame.image.load('checkers/assets/crown3.png'), (45, 25))
+#player colors, small integers (both true) the engine compares and keys tables by, drawn in the piece colors above
+WHITE = 1
+BLACK = 2
+#game result of a draw (see Board.result)
+DRAW = 'draw'
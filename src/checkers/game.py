@@ -1,6 +1,7 @@
 import pygame
 from .board import Board
-from .constants import BLACK, WHITE, SQUARE_SIZE, GOLD
+from .constants import BLACK, WHITE
+from . import bitboard, pdn, render
 
 
 class Game:
@@ -25,6 +26,8 @@ class Game:
         self.turn = BLACK
         self.valid_moves = {}
         self.board = Board()
+        # PDN record of the moves played (see checkers.pdn)
+        self.record = pdn.PdnGame.new()
 
     def reset(self):
         """
@@ -63,8 +66,10 @@ class Game:
         """
         piece = self.board.get_piece(row, col)
         if self.selected and piece == 0 and (row, col) in self.valid_moves:
-            self.board.move(self.selected, row, col)
             skipped = self.valid_moves[(row, col)]
+            self.record.moves.append(pdn.move_text(bitboard.square(self.selected.row, self.selected.col),
+                                                   bitboard.square(row, col), bool(skipped)))
+            self.board.move(self.selected, row, col)
             if skipped:
                 self.board.remove(skipped)
             self.change_turn()
@@ -74,10 +79,13 @@ class Game:
 
     def winner(self):
         """
-        Check if win condition met
-        :return: COLOR value that won
+        Check if the game is over: a side with no pieces or no legal move has lost, or it is drawn by threefold
+        repetition or the no progress rule
+        :return: COLOR value that won, DRAW, or None while the game goes on
         """
-        return self.board.winner()
+        result = self.board.result(self.turn)
+        self.record.result = pdn.RESULTS[result]
+        return result
 
     def change_turn(self):
         """
@@ -94,12 +102,7 @@ class Game:
         Draw gold boxes for valid moves of selected piece
         :param moves: dictionary {(row, column), []}
         """
-        for move in moves:
-            row, col = move
-            s = pygame.Surface((SQUARE_SIZE, SQUARE_SIZE))
-            s.set_alpha(128)
-            s.fill(GOLD)
-            self.window.blit(s, (col * SQUARE_SIZE, row * SQUARE_SIZE))
+        render.draw_valid_moves(self.window, moves)
 
     def get_board(self):
         return self.board
@@ -107,7 +110,10 @@ class Game:
     def ai_move(self, board):
         """
         Set new board and re-initialize game values
-        :param board:
+        :param board: board after a move of the color to move
         """
+        move = pdn.played_move(self.board, self.turn, board)
+        if move is not None:
+            self.record.add(move)
         self.board = board
         self.update()
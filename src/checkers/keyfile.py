@@ -0,0 +1,84 @@
+"""
+Read-only files of fixed size records looked up by 64-bit position key, shared by the tablebase and the opening book.
+Layout: header (magic, version, a file specific parameter, count), count keys (little-endian uint64, ascending),
+then count records of record_size bytes in key order. Files are memory-mapped and binary searched, so opening one is
+instant, a lookup only reads the pages it touches and every process that opens the file shares them.
+"""
+from array import array
+import struct
+import mmap
+import sys
+
+# magic, version, parameter, number of records
+HEADER = struct.Struct('<4sHHI')
+_KEY = struct.Struct('<Q')
+
+
+def write(path, magic, version, parameter, keys, records):
+    """
+    Write a key file
+    :param path: file to write
+    :param magic: 4 bytes identifying the kind of file
+    :param version: format version of the records
+    :param parameter: number stored in the header for the reader (0 to 65535)
+    :param keys: ascending position keys
+    :param records: bytes of every record, in key order, all the same length
+    """
+    key_array = array('Q', keys)
+    if sys.byteorder == 'big':
+        key_array.byteswap()
+    with open(path, 'wb') as file:
+        file.write(HEADER.pack(magic, version, parameter, len(key_array)))
+        file.write(key_array.tobytes())
+        for record in records:
+            file.write(record)
+
+
+class KeyFile:
+    """
+    Memory-mapped key file
+    """
+
+    def __init__(self, path, magic, version, record_size):
+        """
+        :param path: file written by write
+        :param magic: expected magic
+        :param version: expected version
+        :param record_size: bytes per record
+        """
+        self.path = path
+        with open(path, 'rb') as file:
+            self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        file_magic, file_version, self.parameter, self.count = HEADER.unpack_from(self.map, 0)
+        if file_magic != magic or file_version != version:
+            self.map.close()
+            raise ValueError('%s is not a %s file of version %d' % (path, magic.decode(), version))
+        self.record_size = record_size
+        self.records = HEADER.size + 8 * self.count
+
+    def find(self, key):
+        """
+        :param key: position key
+        :return: record number of key, or -1 if it is not in the file
+        """
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) >> 1
+            if _KEY.unpack_from(self.map, HEADER.size + 8 * middle)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.count and _KEY.unpack_from(self.map, HEADER.size + 8 * low)[0] == key:
+            return low
+        return -1
+
+    def record(self, number):
+        """
+        :param number: record number from find
+        :return: bytes of the record
+        """
+        start = self.records + number * self.record_size
+        return self.map[start:start + self.record_size]
+
+    def close(self):
+        self.map.close()
@@ -0,0 +1,39 @@
+from . import bitboard
+
+
+class Move:
+    """
+    A move on the bitboards of a Board. Squares are single bits, captured is the mask of every piece jumped over.
+    Boards play moves in place with Board.make_move and take them back with Board.unmake_move.
+    A position has at most one move from a square to another, so key (start and end) identifies a move of a position
+    """
+    __slots__ = ('start', 'end', 'captured', 'promotion', 'key')
+
+    def __init__(self, start, end, captured, promotion):
+        self.start = start
+        self.end = end
+        self.captured = captured
+        self.promotion = promotion
+        self.key = (start << 32) | end
+
+    def get_start(self):
+        return bitboard.row_col(self.start)
+
+    def get_end(self):
+        return bitboard.row_col(self.end)
+
+    def get_captured(self):
+        """
+        :return: (row, col) of every captured piece
+        """
+        return [bitboard.row_col(bit) for bit in bitboard.iter_bits(self.captured)]
+
+    def __eq__(self, other):
+        return isinstance(other, Move) and self.key == other.key
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __repr__(self):
+        return 'Move(%s -> %s, captured=%s%s)' % (self.get_start(), self.get_end(), self.get_captured(),
+                                                  ', promotion' if self.promotion else '')
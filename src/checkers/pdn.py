@@ -0,0 +1,345 @@
+"""
+Game records in Portable Draughts Notation (PDN): tag pairs, then the moves with their numbers, comments in braces and
+the result.
+
+    [Event "Checkers-AI"]
+    [Result "1-0"]
+    1. 11-15 23-19 2. 8-11 {a comment} 22-17 ... 1-0
+
+Squares are numbered 1 to 32 the standard way, from black's side of the board (black moves first): square 32 - index
+of the bitboard square index, so black starts on 1 to 12 and white on 21 to 32. A move is written start-end, or
+startxend for a capture, a multiple jump only giving its first and last squares (a position has at most one move
+between two squares, see Move). Results are for black, the first player: 1-0 black won, 0-1 white won, 1/2-1/2 a draw
+and * a game that did not finish. The reader skips variations in parentheses and $n annotation glyphs.
+
+Collections are read and written one game at a time, so files of any size go through in constant memory:
+
+    with open('games.pdn') as source, open('copy.pdn', 'w') as out:
+        for game in read_games(source):
+            write_game(out, game)
+"""
+from .board import Board
+from .constants import WHITE, BLACK, DRAW
+from . import bitboard
+import time
+import re
+
+# game result -> PDN result
+RESULTS = {BLACK: '1-0', WHITE: '0-1', DRAW: '1/2-1/2', None: '*'}
+# result tokens of the readers, with the 2 points for a win scoring of some collections
+_RESULT_TOKENS = {'1-0': '1-0', '0-1': '0-1', '1/2-1/2': '1/2-1/2', '*': '*', '2-0': '1-0', '0-2': '0-1',
+                  '1-1': '1/2-1/2'}
+_TAG = re.compile(r'\[\s*(\w+)\s+"((?:[^"\\]|\\.)*)"\s*\]')
+# move number, then the squares of a move and strength marks like ? or !
+_MOVE = re.compile(r'^(?:\d+\.+)?(\d+(?:[-x:]\d+)+)[?!]*$')
+# words of the moves: parentheses of variations on their own, then anything up to a space or a parenthesis
+_WORD = re.compile(r'[()]|[^\s()]+')
+# numeric annotation glyph, like $1 for a good move
+_NAG = re.compile(r'^\$\d+$')
+_LINE_LENGTH = 79
+
+
+def square_number(bit):
+    """
+    :param bit: bit of a playable square
+    :return: PDN number of the square (1 to 32)
+    """
+    return 32 - (bit.bit_length() - 1)
+
+
+def square_bit(number):
+    """
+    :param number: PDN number of a square
+    :return: bit of the square
+    """
+    if not 1 <= number <= 32:
+        raise ValueError('no square %d on the board' % number)
+    return 1 << (32 - number)
+
+
+def move_text(start, end, capture):
+    """
+    :param start: bit of the square the piece leaves
+    :param end: bit of the square it ends on
+    :param capture: if the move jumps
+    :return: PDN text of the move
+    """
+    return '%d%s%d' % (square_number(start), 'x' if capture else '-', square_number(end))
+
+
+def find_move(board, color, text):
+    """
+    :param board: Board
+    :param color: color to move
+    :param text: PDN text of a move of color
+    :return: the Move
+    """
+    match = _MOVE.match(text)
+    if match is None:
+        raise ValueError('not a PDN move: %r' % text)
+    squares = re.split('[-x:]', match.group(1))
+    key = square_bit(int(squares[0])) << 32 | square_bit(int(squares[-1]))
+    for move in board.generate_moves(color):
+        if move.key == key:
+            return move
+    raise ValueError('%s is not a legal move' % text)
+
+
+def played_move(board, color, new_board):
+    """
+    The move that turned board into new_board, for engines that return boards
+    :param board: Board before the move
+    :param color: color that moved
+    :param new_board: Board after the move
+    :return: the Move, None if no move of color leads to new_board
+    """
+    position = new_board.white, new_board.black, new_board.kings
+    for move in board.generate_moves(color):
+        undo = board.make_move(move)
+        reached = (board.white, board.black, board.kings) == position
+        board.unmake_move(undo)
+        if reached:
+            return move
+    return None
+
+
+def fen(board, color):
+    """
+    :param board: Board
+    :param color: color to move
+    :return: PDN FEN tag value of the position, e.g. B:W21,22,K30:B1,K9
+    """
+    def pieces(mask):
+        return ','.join(('K' if board.kings & bit else '') + str(square_number(bit))
+                        for bit in sorted(bitboard.iter_bits(mask), key=square_number))
+    return '%s:W%s:B%s' % ('B' if color == BLACK else 'W', pieces(board.white), pieces(board.black))
+
+
+def parse_fen(text):
+    """
+    :param text: PDN FEN tag value, squares given one by one or as ranges like 1-12
+    :return: (board, color to move)
+    """
+    fields = text.strip().rstrip('.').split(':')
+    if len(fields) != 3 or fields[0].upper() not in ('B', 'W'):
+        raise ValueError('not a PDN FEN: %r' % text)
+    masks = {'W': 0, 'B': 0}
+    kings = 0
+    for field in fields[1:]:
+        side = field[:1].upper()
+        if side not in masks:
+            raise ValueError('not a PDN FEN: %r' % text)
+        for item in filter(None, field[1:].split(',')):
+            king = item[:1].upper() == 'K'
+            first, _, last = item.lstrip('Kk').partition('-')
+            for number in range(int(first), int(last or first) + 1):
+                masks[side] |= square_bit(number)
+                if king:
+                    kings |= square_bit(number)
+    board = Board()
+    board.set_position(masks['W'], masks['B'], kings)
+    return board, (BLACK if fields[0].upper() == 'B' else WHITE)
+
+
+class PdnGame:
+    """
+    A game record: tags, the PDN text of every move, comments and the result
+    """
+
+    def __init__(self, tags=None, moves=None, comments=None, result='*'):
+        """
+        :param tags: {name: value} in the order they are written
+        :param moves: PDN text of every move
+        :param comments: {ply: text}, the comment after move ply (1 for the first move), 0 before the first move
+        :param result: PDN result
+        """
+        self.tags = dict(tags or {})
+        self.moves = list(moves or [])
+        self.comments = dict(comments or {})
+        self.result = result
+        # why read_games could not read the moves of the game, None if it could
+        self.error = None
+
+    @staticmethod
+    def new(black='?', white='?', event='Checkers-AI'):
+        """
+        :return: empty record of a game starting now
+        """
+        return PdnGame({'Event': event, 'Date': time.strftime('%Y.%m.%d'), 'Black': black, 'White': white})
+
+    def add(self, move, comment=None):
+        """
+        Record a move
+        :param move: Move played
+        :param comment: text to write after it, None for none
+        """
+        self.moves.append(move_text(move.start, move.end, move.captured))
+        if comment is not None:
+            self.comments[len(self.moves)] = comment
+
+    def start(self):
+        """
+        :return: (board, color to move) at the start of the game, from the FEN tag if there is one
+        """
+        if 'FEN' in self.tags:
+            return parse_fen(self.tags['FEN'])
+        return Board(), BLACK
+
+    def replay(self):
+        """
+        Play the moves of the game
+        :return: generator of (board before the move, color to move, Move), raising ValueError at an illegal move
+        """
+        board, color = self.start()
+        for ply, text in enumerate(self.moves):
+            try:
+                move = find_move(board, color, text)
+            except ValueError as error:
+                raise ValueError('move %d: %s' % (ply // 2 + 1, error))
+            yield board.copy(), color, move
+            board.make_move(move)
+            color = WHITE if color == BLACK else BLACK
+
+    def final(self):
+        """
+        :return: (board, color to move) after the last move
+        """
+        board, color = self.start()
+        for position, color, move in self.replay():
+            board = position
+            board.make_move(move)
+            color = WHITE if color == BLACK else BLACK
+        return board, color
+
+
+def _tokens(lines):
+    """
+    Split PDN text into tags, comments and words
+    :param lines: iterable of lines
+    :return: generator of ('tag', (name, value)), ('comment', text) and ('word', text)
+    """
+    comment = None
+    for line in lines:
+        position = 0
+        if comment is None:
+            if line.startswith('%'):
+                continue
+            stripped = line.strip()
+            if stripped.startswith('['):
+                match = _TAG.match(stripped)
+                if match is not None:
+                    yield 'tag', (match.group(1), match.group(2).replace('\\"', '"').replace('\\\\', '\\'))
+                    continue
+        while position < len(line):
+            if comment is not None:
+                end = line.find('}', position)
+                if end < 0:
+                    comment.append(line[position:])
+                    break
+                comment.append(line[position:end])
+                yield 'comment', ' '.join(''.join(comment).split())
+                comment = None
+                position = end + 1
+                continue
+            start = line.find('{', position)
+            for word in _WORD.findall(line, position, start if start >= 0 else len(line)):
+                yield 'word', word
+            if start < 0:
+                break
+            comment = []
+            position = start + 1
+    if comment is not None:
+        yield 'comment', ' '.join(''.join(comment).split())
+
+
+def read_games(lines):
+    """
+    Read the games of a PDN collection one at a time. Variations and annotation glyphs are skipped; a game with
+    anything else that is neither a move nor a result has its error set, and the games after it are read as usual
+    :param lines: iterable of lines, such as an open file
+    :return: generator of PdnGame
+    """
+    game = None
+    # parentheses of variations open in the game
+    depth = 0
+    for kind, value in _tokens(lines):
+        if game is None:
+            game = PdnGame()
+        if kind == 'tag':
+            if game.moves or game.comments or game.error:
+                # tags of the next game after a game without a result
+                yield _finish(game, depth)
+                game, depth = PdnGame(), 0
+            game.tags[value[0]] = value[1]
+        elif kind == 'word' and value == '(':
+            depth += 1
+        elif kind == 'word' and value == ')':
+            if depth:
+                depth -= 1
+            elif game.error is None:
+                game.error = 'unmatched ) in the moves'
+        elif depth or kind == 'word' and _NAG.match(value):
+            # moves and comments of a variation
+            continue
+        elif kind == 'comment':
+            ply = len(game.moves)
+            game.comments[ply] = game.comments[ply] + ' ' + value if ply in game.comments else value
+        elif value in _RESULT_TOKENS:
+            game.result = _RESULT_TOKENS[value]
+            yield _finish(game, depth)
+            game, depth = None, 0
+        else:
+            match = _MOVE.match(value)
+            if match is not None:
+                game.moves.append(match.group(1).replace(':', 'x'))
+            elif not re.match(r'^\d+\.+$', value) and game.error is None:
+                game.error = 'unexpected %r in the moves' % value
+    if game is not None and (game.tags or game.moves or game.error):
+        yield _finish(game, depth)
+
+
+def _finish(game, depth):
+    """
+    :param depth: variations left open at the end of the game
+    :return: game, with an error if a variation is left open
+    """
+    if depth and game.error is None:
+        game.error = 'unmatched ( in the moves'
+    return game
+
+
+def write_game(file, game):
+    """
+    Write a game in PDN, its Result tag set to its result
+    :param file: writable text file
+    :param game: PdnGame
+    """
+    tags = dict(game.tags)
+    tags['Result'] = game.result
+    for name, value in tags.items():
+        file.write('[%s "%s"]\n' % (name, str(value).replace('\\', '\\\\').replace('"', '\\"')))
+    comments = {ply: '{%s}' % text.replace('}', '') for ply, text in game.comments.items()}
+    words = [comments[0]] if 0 in comments else []
+    color = game.start()[1] if 'FEN' in tags else BLACK
+    number = 1
+    for ply, text in enumerate(game.moves, 1):
+        # a move number stays on the line of its move
+        if color == BLACK:
+            text = '%d. %s' % (number, text)
+        elif ply == 1:
+            text = '%d... %s' % (number, text)
+        words.append(text)
+        if ply in comments:
+            words.append(comments[ply])
+        if color == WHITE:
+            number += 1
+        color = WHITE if color == BLACK else BLACK
+    words.append(game.result)
+    line = ''
+    for word in words:
+        if line and len(line) + 1 + len(word) > _LINE_LENGTH:
+            file.write(line + '\n')
+            line = word
+        else:
+            line = line + ' ' + word if line else word
+    file.write(line + '\n\n')
@@ -0,0 +1,134 @@
+"""
+Perft: count the positions reached after a number of moves, to check the move generator and measure its speed.
+
+    python -m checkers.perft --depth 6 --divide --check
+"""
+from .board import Board
+from .constants import WHITE, BLACK
+from . import simulation
+import argparse
+import time
+
+# leaf counts from the starting position (black to move) under this game's rules: captures are not forced and every
+# landing of a multi-jump is a move of its own. Depths 1 and 2 match the published checkers figures, deeper counts
+# are higher because the published ones force captures
+START_COUNTS = {1: 7, 2: 49, 3: 379, 4: 2872, 5: 23582, 6: 190647, 7: 1607272}
+# published perft of 8x8 checkers with forced captures, for reference
+FORCED_CAPTURE_COUNTS = {1: 7, 2: 49, 3: 302, 4: 1469, 5: 7361, 6: 36768, 7: 179740}
+
+
+def perft(board, depth, color):
+    """
+    Count the leaf positions depth moves below board, playing the moves in place with make_move/unmake_move
+    :param board: board to count from (restored when done)
+    :param depth: number of moves
+    :param color: color to move
+    :return: number of leaf positions
+    """
+    if depth == 0:
+        return 1
+    if depth == 1:
+        return sum(1 for _ in board.generate_moves(color))
+    next_color = BLACK if color == WHITE else WHITE
+    count = 0
+    for move in board.generate_moves(color):
+        undo = board.make_move(move)
+        count += perft(board, depth - 1, next_color)
+        board.unmake_move(undo)
+    return count
+
+
+def divide(board, depth, color):
+    """
+    Perft split by root move, to find which move a wrong count comes from
+    :param board: board to count from (restored when done)
+    :param depth: number of moves, at least 1
+    :param color: color to move
+    :return: [(Move, leaf positions below it)] in generation order
+    """
+    next_color = BLACK if color == WHITE else WHITE
+    counts = []
+    for move in board.generate_moves(color):
+        undo = board.make_move(move)
+        counts.append((move, perft(board, depth - 1, next_color)))
+        board.unmake_move(undo)
+    return counts
+
+
+def perft_pieces(board, depth, color):
+    """
+    Perft through the Piece API the game uses (get_all_pieces, get_valid_moves, simulation.simulate_move),
+    copying the board for every move. Slow, it is the reference the fast generator is checked against
+    :param board: board to count from (not changed)
+    :param depth: number of moves
+    :param color: color to move
+    :return: number of leaf positions
+    """
+    if depth == 0:
+        return 1
+    next_color = BLACK if color == WHITE else WHITE
+    count = 0
+    for piece in board.get_all_pieces(color):
+        for (row, col), skip in board.get_valid_moves(piece).items():
+            new_board = board.copy()
+            simulation.simulate_move(new_board.get_piece(piece.row, piece.col), (row, col), new_board, skip)
+            count += perft_pieces(new_board, depth - 1, next_color)
+    return count
+
+
+def perft_boards(board, depth, color):
+    """
+    Perft through simulation.get_all_moves, one new board per move
+    :return: number of leaf positions
+    """
+    if depth == 0:
+        return 1
+    next_color = BLACK if color == WHITE else WHITE
+    return sum(perft_boards(child, depth - 1, next_color) for child in simulation.get_all_moves(board, color))
+
+
+def check(max_depth=5, reference_depth=4):
+    """
+    Check the counts from the starting position against START_COUNTS, and against the Piece API up to reference_depth
+    :param max_depth: deepest count to check
+    :param reference_depth: deepest count to also run through perft_pieces and perft_boards
+    :return: list of mismatch messages, empty if every count is right
+    """
+    errors = []
+    for depth in range(1, max_depth + 1):
+        count = perft(Board(), depth, BLACK)
+        if depth in START_COUNTS and count != START_COUNTS[depth]:
+            errors.append('depth %d: %d, expected %d' % (depth, count, START_COUNTS[depth]))
+        if depth <= reference_depth:
+            for name, reference in (('perft_pieces', perft_pieces), ('perft_boards', perft_boards)):
+                expected = reference(Board(), depth, BLACK)
+                if count != expected:
+                    errors.append('depth %d: %d, %s gives %d' % (depth, count, name, expected))
+    return errors
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Count move generator leaf positions from the starting position')
+    parser.add_argument('--depth', type=int, default=6)
+    parser.add_argument('--divide', action='store_true', help='print the count below every root move')
+    parser.add_argument('--check', action='store_true', help='check the counts against the known figures')
+    args = parser.parse_args()
+
+    board = Board()
+    start = time.perf_counter()
+    if args.divide:
+        counts = divide(board, args.depth, BLACK)
+        for move, count in counts:
+            print('%s %d' % (move, count))
+        nodes = sum(count for _, count in counts)
+    else:
+        nodes = perft(board, args.depth, BLACK)
+    seconds = time.perf_counter() - start
+    print('perft(%d) = %d in %.3fs, %.0f nodes/sec' % (args.depth, nodes, seconds, nodes / seconds))
+
+    if args.check:
+        errors = check(args.depth)
+        for error in errors:
+            print('MISMATCH ' + error)
+        print('check %s' % ('failed' if errors else 'passed'))
+        raise SystemExit(1 if errors else 0)
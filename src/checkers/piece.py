@@ -1,10 +1,12 @@
-from .constants import SQUARE_SIZE, CROWN
-import pygame
+from .constants import WHITE
 
 
 class Piece:
-    PADDING = 15
-    OUTLINE = 2.5
+    """
+    A piece of the Piece API (Board.get_piece, get_all_pieces, get_valid_moves, move). Pieces are made from the
+    bitboards when asked for, searches never build them. Pixel positions are left to checkers.render
+    """
+    __slots__ = ('row', 'col', 'color', 'king')
 
     def __init__(self, row, col, color):
         self.row = row
@@ -12,17 +14,6 @@ class Piece:
         self.color = color
         self.king = False
 
-        self.x = 0
-        self.y = 0
-        self.calc_position()
-
-    def calc_position(self):
-        """
-        Calculate position visually on display
-        """
-        self.x = SQUARE_SIZE * self.col + SQUARE_SIZE // 2
-        self.y = SQUARE_SIZE * self.row + SQUARE_SIZE // 2
-
     def make_king(self):
         self.king = True
 
@@ -31,11 +22,8 @@ class Piece:
         Draw piece visually on pygame display window
         :param window: pygame display window (800x800 pixels)
         """
-        radius = SQUARE_SIZE // 2 - self.PADDING
-        pygame.draw.circle(window, (0,0,0), (self.x, self.y), radius + self.OUTLINE)
-        pygame.draw.circle(window, self.color, (self.x, self.y), radius)
-        if self.king:
-            window.blit(CROWN, (self.x - CROWN.get_width()//2, self.y - CROWN.get_height()//2))
+        from . import render
+        render.draw_piece(window, self)
 
     def move(self, row, col):
         """
@@ -45,7 +33,7 @@ class Piece:
         """
         self.row = row
         self.col = col
-        self.calc_position()
 
     def __repr__(self):
-        return str(self.color)
+        return 'Piece(%d, %d, %s%s)' % (self.row, self.col, 'white' if self.color == WHITE else 'black',
+                                        ' king' if self.king else '')
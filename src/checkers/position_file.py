@@ -0,0 +1,137 @@
+"""
+Files of millions of positions, such as training data dumps: the Board.to_bytes encoding of every position, each
+followed by the same number of bytes of data of the writer's own (a score, a game result...).
+Layout: header (magic, version, bytes of data per record, count), then count records of POSITION_SIZE + data bytes.
+Files are written as a stream, with the count filled in when the writer closes, and read memory-mapped, so a process
+can open a file of any size at once and read any range of it.
+
+    with PositionWriter('positions.bin', data_size=1) as writer:
+        writer.write(board, color, bytes((result,)))
+    with PositionFile('positions.bin') as positions:
+        for board, color, data in positions:
+            ...
+"""
+from .board import Board, POSITION_SIZE
+from .keyfile import HEADER
+import mmap
+
+MAGIC = b'CKPF'
+VERSION = 1
+
+
+class PositionWriter:
+    """
+    Position file being written, records are appended as they come
+    """
+
+    def __init__(self, path, data_size=0):
+        """
+        :param path: file to write
+        :param data_size: bytes of data after every position (0 to 65535)
+        """
+        self.path = path
+        self.data_size = data_size
+        self.count = 0
+        self.file = open(path, 'wb')
+        self.file.write(HEADER.pack(MAGIC, VERSION, data_size, 0))
+
+    def write(self, board, color, data=b''):
+        """
+        Append a position
+        :param board: Board
+        :param color: color to move
+        :param data: data_size bytes stored with the position
+        """
+        if len(data) != self.data_size:
+            raise ValueError('records of %s hold %d bytes of data, got %d' % (self.path, self.data_size, len(data)))
+        self.file.write(board.to_bytes(color))
+        self.file.write(data)
+        self.count += 1
+
+    def write_encoded(self, position, data=b''):
+        """
+        Append a position already encoded by Board.to_bytes
+        :param position: Board.to_bytes of the position
+        :param data: data_size bytes stored with the position
+        """
+        if len(position) != POSITION_SIZE or len(data) != self.data_size:
+            raise ValueError('expected a %d byte position and %d bytes of data' % (POSITION_SIZE, self.data_size))
+        self.file.write(position)
+        self.file.write(data)
+        self.count += 1
+
+    def close(self):
+        """
+        Write the count into the header and close the file
+        """
+        self.file.seek(0)
+        self.file.write(HEADER.pack(MAGIC, VERSION, self.data_size, self.count))
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class PositionFile:
+    """
+    Position file, memory-mapped
+    """
+
+    def __init__(self, path):
+        """
+        :param path: file written by PositionWriter
+        """
+        self.path = path
+        with open(path, 'rb') as file:
+            self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.data_size, self.count = HEADER.unpack_from(self.map, 0)
+        self.record_size = POSITION_SIZE + self.data_size
+        if magic != MAGIC or version != VERSION or len(self.map) != HEADER.size + self.count * self.record_size:
+            self.map.close()
+            raise ValueError('%s is not a complete position file of version %d' % (path, VERSION))
+
+    def __len__(self):
+        return self.count
+
+    def record(self, number):
+        """
+        :param number: record number
+        :return: (Board.to_bytes of the position, data bytes)
+        """
+        if not 0 <= number < self.count:
+            raise IndexError('record %d of %d' % (number, self.count))
+        start = HEADER.size + number * self.record_size
+        return self.map[start:start + POSITION_SIZE], self.map[start + POSITION_SIZE:start + self.record_size]
+
+    def __getitem__(self, number):
+        """
+        :return: (board, color to move, data bytes) of record number
+        """
+        position, data = self.record(number)
+        return Board.from_bytes(position) + (data,)
+
+    def read(self, start=0, stop=None):
+        """
+        Decode a range of records in order, so worker processes can share a file by ranges
+        :param start: first record
+        :param stop: record after the last one, the end of the file if None
+        :return: generator of (board, color to move, data bytes)
+        """
+        stop = self.count if stop is None else min(stop, self.count)
+        for number in range(start, stop):
+            yield self[number]
+
+    def __iter__(self):
+        return self.read()
+
+    def close(self):
+        self.map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
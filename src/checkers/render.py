@@ -0,0 +1,83 @@
+"""
+Drawing of boards and pieces on a pygame window.
+This is the only checkers module that imports pygame, the board, moves, evaluation and searches run without it.
+"""
+from .constants import ROWS, COLS, SQUARE_SIZE, WHITE, BLACK, WHITE_PIECE, BLACK_PIECE, GOLD, DARK_BEIGE, LIGHT_BEIGE
+import pygame
+import os
+
+CROWN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets', 'crown3.png')
+PADDING = 15
+OUTLINE = 2.5
+# fill of the pieces of each player color
+PIECE_COLORS = {WHITE: WHITE_PIECE, BLACK: BLACK_PIECE}
+
+_crown = None
+
+
+def get_crown():
+    """
+    Crown image drawn on kings, loaded on first use
+    :return: pygame Surface
+    """
+    global _crown
+    if _crown is None:
+        _crown = pygame.transform.scale(pygame.image.load(CROWN_PATH), (45, 25))
+    return _crown
+
+
+def draw_squares(window):
+    """
+    Draw the 8x8 board squares
+    :param window: pygame display window (800x800 pixels)
+    """
+    window.fill(DARK_BEIGE)
+    for row in range(ROWS):
+        for col in range(row % 2, COLS, 2):
+            pygame.draw.rect(window, LIGHT_BEIGE, (row * SQUARE_SIZE, col * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE))
+
+
+def square_center(row, col):
+    """
+    :return: (x, y) pixel position of the center of a square
+    """
+    return SQUARE_SIZE * col + SQUARE_SIZE // 2, SQUARE_SIZE * row + SQUARE_SIZE // 2
+
+
+def draw_piece(window, piece):
+    """
+    Draw a piece at the center of its square
+    :param window: pygame display window (800x800 pixels)
+    :param piece: Piece
+    """
+    x, y = square_center(piece.row, piece.col)
+    radius = SQUARE_SIZE // 2 - PADDING
+    pygame.draw.circle(window, (0, 0, 0), (x, y), radius + OUTLINE)
+    pygame.draw.circle(window, PIECE_COLORS[piece.color], (x, y), radius)
+    if piece.king:
+        crown = get_crown()
+        window.blit(crown, (x - crown.get_width() // 2, y - crown.get_height() // 2))
+
+
+def draw_board(window, board):
+    """
+    Draw the board squares and every piece
+    :param window: pygame display window (800x800 pixels)
+    :param board: Board
+    """
+    draw_squares(window)
+    for piece in board.get_all_pieces(WHITE) + board.get_all_pieces(BLACK):
+        draw_piece(window, piece)
+
+
+def draw_valid_moves(window, moves):
+    """
+    Draw gold boxes for valid moves of selected piece
+    :param window: pygame display window (800x800 pixels)
+    :param moves: dictionary {(row, column), []}
+    """
+    for row, col in moves:
+        s = pygame.Surface((SQUARE_SIZE, SQUARE_SIZE))
+        s.set_alpha(128)
+        s.fill(GOLD)
+        window.blit(s, (col * SQUARE_SIZE, row * SQUARE_SIZE))
@@ -1,4 +1,5 @@
-from copy import deepcopy
+from .board import Board
+from .constants import WHITE
 
 
 def simulate_move(piece, move, board, skip):
@@ -19,17 +20,27 @@ def simulate_move(piece, move, board, skip):
 def get_all_moves(board, color):
     """
     Get all possible boards generated from all possible moves (only one color pieces)
+    Searches should walk board.generate_moves with make_move/unmake_move instead, this builds a board per move
     :param board: Current board state
     :param color: color of pieces to simulate
     :return: generated boards
     """
     moves = []  # these are boards
-    for piece in board.get_all_pieces(color):
-        valid_moves = board.get_valid_moves(piece)  # these are 'moves' ()
-        for move, skip in valid_moves.items():
-            temp_board = deepcopy(board)
-            temp_piece = temp_board.get_piece(piece.row, piece.col)
-            new_board = simulate_move(temp_piece, move, temp_board, skip)
-            moves.append(new_board)
+    for move in board.generate_moves(color):
+        new_board = board.copy()
+        new_board.make_move(move)
+        moves.append(new_board)
 
     return moves
+
+
+def get_heuristic(heuristic, color):
+    """
+    Look up a heuristic evaluation of Board
+    :param heuristic: heuristic number (1, 2 or 3)
+    :param color: color the evaluation favours
+    :return: evaluation function taking a board
+    """
+    if color == WHITE:
+        return (Board.white_heuristic_eval_1, Board.white_heuristic_eval_2, Board.white_heuristic_eval_3)[heuristic - 1]
+    return (Board.black_heuristic_eval_1, Board.black_heuristic_eval_2, Board.black_heuristic_eval_3)[heuristic - 1]
@@ -0,0 +1,123 @@
+"""
+Counters of the work done by the searches, shared by every engine
+"""
+
+# counter name -> help text, in export order
+COUNTERS = {
+    'nodes': 'Positions visited by the search',
+    'evaluations': 'Leaf positions scored by a heuristic or a rollout',
+    'cutoffs': 'Beta cutoffs',
+    'tt_probes': 'Transposition table lookups',
+    'tt_hits': 'Transposition table lookups that found the position',
+    'tablebase_hits': 'Positions scored by the endgame tablebase',
+    'boards': 'Board objects allocated',
+}
+
+
+def _label_value(value):
+    """
+    :return: value escaped for a Prometheus label: backslash first, then double quote and newline
+    """
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class SearchStats:
+    """
+    Work counters of one or more searches. Pass the same object to several searches to add up their work,
+    and merge the as_dict() of searches run in other processes
+    """
+
+    def __init__(self):
+        self.nodes = 0
+        self.evaluations = 0
+        self.tt_probes = 0
+        self.tt_hits = 0
+        self.tablebase_hits = 0
+        self.boards = 0
+        # beta cutoffs by index of the move that caused them in the move order
+        self.cutoffs_by_index = {}
+        # [(depth, seconds)] of every completed iteration of iterative deepening
+        self.depth_times = []
+        # seconds spent in searches
+        self.time = 0.0
+
+    @property
+    def cutoffs(self):
+        return sum(self.cutoffs_by_index.values())
+
+    def cutoff(self, index):
+        """
+        Count a beta cutoff
+        :param index: index of the cutting move in the move order
+        """
+        self.cutoffs_by_index[index] = self.cutoffs_by_index.get(index, 0) + 1
+
+    def depth_done(self, depth, seconds):
+        """
+        Record a completed iteration of iterative deepening
+        :param depth: depth searched
+        :param seconds: time the iteration took
+        """
+        self.depth_times.append((depth, seconds))
+
+    def first_move_cutoff_rate(self):
+        """
+        :return: share of cutoffs caused by the first move searched (move ordering quality), None without cutoffs
+        """
+        cutoffs = self.cutoffs
+        return self.cutoffs_by_index.get(0, 0) / cutoffs if cutoffs else None
+
+    def merge(self, other):
+        """
+        Add the counts of another search
+        :param other: SearchStats or its as_dict()
+        """
+        if isinstance(other, SearchStats):
+            other = other.as_dict()
+        for name in ('nodes', 'evaluations', 'tt_probes', 'tt_hits', 'tablebase_hits', 'boards', 'time'):
+            setattr(self, name, getattr(self, name) + other.get(name, 0))
+        for index, count in other['cutoffs_by_index'].items():
+            self.cutoffs_by_index[int(index)] = self.cutoffs_by_index.get(int(index), 0) + count
+        self.depth_times.extend((depth, seconds) for depth, seconds in other['depth_times'])
+
+    def as_dict(self):
+        """
+        :return: dict of plain values (JSON serializable, cutoff indexes as strings)
+        """
+        return {'nodes': self.nodes, 'evaluations': self.evaluations, 'cutoffs': self.cutoffs,
+                'tt_probes': self.tt_probes, 'tt_hits': self.tt_hits, 'tablebase_hits': self.tablebase_hits,
+                'boards': self.boards, 'time': self.time,
+                'cutoffs_by_index': {str(index): count for index, count in sorted(self.cutoffs_by_index.items())},
+                'depth_times': [[depth, seconds] for depth, seconds in self.depth_times]}
+
+    def to_prometheus(self, prefix='checkers_search', labels=None):
+        """
+        Export in the Prometheus text exposition format
+        :param prefix: prefix of the metric names
+        :param labels: {label: value} added to every sample, e.g. {'engine': 'alpha_beta'}
+        :return: text
+        """
+        labels = labels or {}
+
+        def sample(name, value, extra=None):
+            pairs = dict(labels, **(extra or {}))
+            label_text = ','.join('%s="%s"' % (key, _label_value(val)) for key, val in pairs.items())
+            return '%s%s %s' % (name, '{%s}' % label_text if label_text else '', value)
+
+        lines = []
+        for counter, text in COUNTERS.items():
+            name = '%s_%s_total' % (prefix, counter)
+            lines += ['# HELP %s %s' % (name, text), '# TYPE %s counter' % name,
+                      sample(name, getattr(self, counter))]
+        name = '%s_cutoffs_by_index_total' % prefix
+        lines += ['# HELP %s Beta cutoffs by index of the cutting move' % name, '# TYPE %s counter' % name]
+        lines += [sample(name, count, {'index': index}) for index, count in sorted(self.cutoffs_by_index.items())]
+        name = '%s_seconds_total' % prefix
+        lines += ['# HELP %s Time spent searching' % name, '# TYPE %s counter' % name, sample(name, self.time)]
+        name = '%s_depth_seconds' % prefix
+        lines += ['# HELP %s Time of the last completed iteration at each depth' % name, '# TYPE %s gauge' % name]
+        lines += [sample(name, seconds, {'depth': depth}) for depth, seconds in dict(self.depth_times).items()]
+        return '\n'.join(lines) + '\n'
+
+    def __repr__(self):
+        return 'SearchStats(%s)' % ', '.join('%s=%s' % (name, getattr(self, name)) for name in COUNTERS)
@@ -0,0 +1,239 @@
+"""
+Endgame tablebase: the game theoretic result of every position with few pieces, found by retrograde analysis.
+
+    python -m checkers.tablebase --pieces 3 --out tablebase3.bin
+
+Results are for the side to move under this game's rules: a side with no pieces or no legal move has lost, and a
+position neither side can force is a draw. They are stored with the distance to the end (in plies) in a file of
+sorted position keys (see checkers.keyfile).
+Each key has a 2 byte little-endian result: outcome in the low 2 bits, distance in the high 14 bits.
+"""
+from .board import Board, WIN_SCORE
+from .constants import WHITE, BLACK
+from . import bitboard, keyfile, zobrist
+from array import array
+from itertools import combinations, product
+import argparse
+import struct
+import sys
+
+MAGIC = b'CKTB'
+VERSION = 2
+RESULT = struct.Struct('<H')
+
+DRAW, WIN, LOSS = 0, 1, 2
+MAX_DISTANCE = 0x3FFF
+
+# piece kinds a square can hold: (white, king)
+_KINDS = ((True, False), (True, True), (False, False), (False, True))
+
+
+def _placements(pieces):
+    """
+    Every position of 2 to pieces pieces with at least one piece of each color. White men are never on the last row
+    and black men never on the first, they would have been crowned
+    :return: generator of (white, black, kings)
+    """
+    for count in range(2, pieces + 1):
+        for squares in combinations([1 << index for index in range(32)], count):
+            for kinds in product(_KINDS, repeat=count):
+                white = black = kings = 0
+                for bit, (is_white, is_king) in zip(squares, kinds):
+                    if is_king:
+                        kings |= bit
+                    elif bit & (bitboard.ROW_MASKS[7] if is_white else bitboard.ROW_MASKS[0]):
+                        break
+                    if is_white:
+                        white |= bit
+                    else:
+                        black |= bit
+                else:
+                    if white and black:
+                        yield white, black, kings
+
+
+def generate(pieces=3, log=None):
+    """
+    Solve every position of up to pieces pieces by retrograde analysis: positions without a move are lost, a
+    position is won if a move reaches a lost position (or takes the last opponent piece) and lost if every move
+    reaches a won one, working back from the shortest results. What is left unresolved is a draw.
+    3 pieces take about ten seconds, 4 pieces about forty times longer and a few GB of memory
+    :param pieces: largest number of pieces on the board
+    :param log: file to write progress to, None for silence
+    :return: (keys, results), parallel lists sorted by key
+    """
+    def say(text):
+        if log is not None:
+            print(text, file=log)
+
+    board = Board()
+    placements = list(_placements(pieces))
+    count = 2 * len(placements)
+    # position number 2 * i (white to move) or 2 * i + 1 (black to move) of placement i
+    index = {}
+    for number, (white, black, kings) in enumerate(placements):
+        key = zobrist.hash_position(white, black, kings)
+        index[key] = 2 * number
+        index[key ^ zobrist.BLACK_TO_MOVE] = 2 * number + 1
+    if len(index) != count:
+        raise ValueError('position keys collide')
+    say('%d positions' % count)
+
+    outcome = bytearray(count)
+    distance = array('H', bytes(2 * count))
+    remaining = array('H', bytes(2 * count))
+    children, parents = array('i'), array('i')
+    lost, won = [], []
+    for number in range(count):
+        board.set_position(*placements[number >> 1])
+        color, next_color = (BLACK, WHITE) if number & 1 else (WHITE, BLACK)
+        moves = 0
+        for move in board.generate_moves(color):
+            moves += 1
+            undo = board.make_move(move)
+            if not board.white_left or not board.black_left:
+                if not outcome[number]:
+                    outcome[number], distance[number] = WIN, 1
+                    won.append(number)
+            else:
+                children.append(index[zobrist.position_key(board, next_color)])
+                parents.append(number)
+            board.unmake_move(undo)
+        remaining[number] = moves
+        if not moves:
+            outcome[number] = LOSS
+            lost.append(number)
+    say('%d moves' % len(children))
+
+    # parents of every position, grouped by child
+    first = array('i', bytes(4 * (count + 1)))
+    for child in children:
+        first[child + 1] += 1
+    for number in range(count):
+        first[number + 1] += first[number]
+    fill = array('i', first)
+    grouped = array('i', bytes(4 * len(children)))
+    for child, parent in zip(children, parents):
+        grouped[fill[child]] = parent
+        fill[child] += 1
+    del children, parents, fill
+
+    layer, depth = lost, 0
+    while layer:
+        next_layer = won if depth == 0 else []
+        for number in layer:
+            loss = outcome[number] == LOSS
+            for parent in grouped[first[number]:first[number + 1]]:
+                if outcome[parent]:
+                    continue
+                if loss:
+                    outcome[parent] = WIN
+                else:
+                    remaining[parent] -= 1
+                    if remaining[parent]:
+                        continue
+                    outcome[parent] = LOSS
+                if depth + 1 > MAX_DISTANCE:
+                    raise ValueError('distance %d does not fit in a result' % (depth + 1))
+                distance[parent] = depth + 1
+                next_layer.append(parent)
+        layer = next_layer
+        depth += 1
+    say('solved to distance %d, %d won, %d lost, %d drawn' % (
+        depth - 1, outcome.count(WIN), outcome.count(LOSS), outcome.count(DRAW)))
+
+    keys = sorted(index)
+    results = [outcome[index[key]] | distance[index[key]] << 2 for key in keys]
+    return keys, results
+
+
+def write(path, pieces, keys, results):
+    """
+    Write a tablebase file
+    :param path: file to write
+    :param pieces: largest number of pieces of the positions
+    :param keys: position keys, ascending
+    :param results: result of every key
+    """
+    keyfile.write(path, MAGIC, VERSION, pieces, keys, [RESULT.pack(result) for result in results])
+
+
+class Tablebase:
+    """
+    Tablebase file, memory-mapped (see checkers.keyfile)
+    """
+
+    def __init__(self, path):
+        """
+        :param path: file written by write
+        """
+        self.path = path
+        self.file = keyfile.KeyFile(path, MAGIC, VERSION, RESULT.size)
+        self.pieces = self.file.parameter
+
+    def probe_key(self, key):
+        """
+        :param key: position key (see zobrist.position_key)
+        :return: (outcome, distance) for the side to move, or None if the position is not in the table
+        """
+        number = self.file.find(key)
+        if number < 0:
+            return None
+        result = RESULT.unpack(self.file.record(number))[0]
+        return result & 3, result >> 2
+
+    def probe(self, board, color):
+        """
+        :param board: Board
+        :param color: color to move
+        :return: (outcome, distance) for the side to move, or None if board has too many pieces
+        """
+        if board.white_left + board.black_left > self.pieces:
+            return None
+        return self.probe_key(zobrist.position_key(board, color))
+
+    def score(self, board, color, max_color, ply=0):
+        """
+        Search score of a position, on the scale of the wins AlphaBeta finds by search: WIN_SCORE less the ply the
+        game ends at
+        :param board: Board
+        :param color: color to move
+        :param max_color: color the score is for
+        :param ply: distance of the position from the root of the search
+        :return: WIN_SCORE less ply and the distance for a win of max_color, its negation for a loss, 0 for a draw,
+        None if the position is not in the table
+        """
+        result = self.probe(board, color)
+        if result is None:
+            return None
+        outcome, distance = result
+        if outcome == DRAW:
+            return 0
+        score = WIN_SCORE - ply - distance
+        return score if (outcome == WIN) == (color == max_color) else -score
+
+    def value(self, board, color):
+        """
+        Result of a position as a Monte Carlo rollout value
+        :param board: Board
+        :param color: color to move
+        :return: 1 if color wins, -1 if it loses, 0 for a draw, None if the position is not in the table
+        """
+        result = self.probe(board, color)
+        if result is None:
+            return None
+        return (0, 1, -1)[result[0]]
+
+    def close(self):
+        self.file.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate an endgame tablebase')
+    parser.add_argument('--pieces', type=int, default=3, help='largest number of pieces on the board (2 to 4)')
+    parser.add_argument('--out', default='tablebase.bin')
+    args = parser.parse_args()
+    if not 2 <= args.pieces <= 4:
+        parser.error('--pieces must be 2, 3 or 4')
+    table_keys, table_results = generate(args.pieces, log=sys.stderr)
+    write(args.out, args.pieces, table_keys, table_results)
@@ -0,0 +1,46 @@
+"""
+Zobrist keys for board positions. Keys come from a fixed seed so position hashes are the same in every process
+and can be stored in files.
+"""
+from .constants import BLACK
+from . import bitboard
+import random
+
+_random = random.Random(0x5EED_C4EC)
+
+
+def _keys():
+    return {1 << index: _random.getrandbits(64) for index in range(32)}
+
+
+WHITE_MAN = _keys()
+BLACK_MAN = _keys()
+WHITE_KING = _keys()
+BLACK_KING = _keys()
+# xor-ed into a position hash when black is to move
+BLACK_TO_MOVE = _random.getrandbits(64)
+
+
+def hash_position(white, black, kings):
+    """
+    Hash a position from scratch
+    :param white: white pieces
+    :param black: black pieces
+    :param kings: kings of both colors
+    :return: 64-bit hash (without side to move)
+    """
+    key = 0
+    for bit in bitboard.iter_bits(white):
+        key ^= WHITE_KING[bit] if kings & bit else WHITE_MAN[bit]
+    for bit in bitboard.iter_bits(black):
+        key ^= BLACK_KING[bit] if kings & bit else BLACK_MAN[bit]
+    return key
+
+
+def position_key(board, color):
+    """
+    :param board: Board
+    :param color: color to move
+    :return: key of the position with side to move (the key searches use for their transposition tables)
+    """
+    return board.hash ^ BLACK_TO_MOVE if color == BLACK else board.hash
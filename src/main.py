@@ -1,11 +1,23 @@
-from checkers.constants import WIDTH, HEIGHT, SQUARE_SIZE, BLACK, DARK_BEIGE, WHITE
+from checkers.constants import WIDTH, HEIGHT, SQUARE_SIZE, BLACK, DARK_BEIGE, WHITE, DRAW
 from checkers.game import Game
-from minimax.minimax import minimax
-from minimax.alpha_beta import alpha_beta
-from monte_carlo.monte_carlo_tree_search import monte_carlo_tree_search
+from minimax.async_search import AsyncSearch
+from checkers.tablebase import Tablebase
+from minimax.opening_book import OpeningBook
+from checkers import pdn
 import pygame
+import os
 
 FPS = 60
+# fixed depth for the minimax / alpha_beta alternatives below
+DEPTH = 6
+# time the AI may think about a move, in milliseconds
+MOVE_TIME = 1000
+# endgame tablebase made with python -m checkers.tablebase, used when the file exists
+TABLEBASE = 'tablebase3.bin'
+# opening book made with python -m minimax.opening_book, used when the file exists
+OPENING_BOOK = 'opening_book.bin'
+# every game played is appended to this PDN file
+GAMES_FILE = 'games.pdn'
 WINDOW = pygame.display.set_mode((WIDTH, HEIGHT))
 pygame.display.set_caption('Checkers')
 global nodes
@@ -18,6 +30,15 @@ def get_row_col_from_mouse(pos):
     return row, col
 
 
+def save_game(game):
+    """
+    Append the record of a game to GAMES_FILE, if a move was played
+    """
+    if game.record.moves:
+        with open(GAMES_FILE, 'a') as file:
+            pdn.write_game(file, game.record)
+
+
 def main():
 
     run = True
@@ -27,28 +48,49 @@ def main():
     game = Game(WINDOW)
     font = pygame.font.Font('freesansbold.ttf', 20)
 
-    neg_inf = float('-inf')
-    pos_inf = float('inf')
+    tablebase = Tablebase(TABLEBASE) if os.path.exists(TABLEBASE) else None
+    book = OpeningBook(OPENING_BOOK) if os.path.exists(OPENING_BOOK) else None
+    # the AI searches on a background thread so the window keeps drawing and handling events
+    engine = AsyncSearch(2, WHITE, BLACK, MOVE_TIME, tablebase=tablebase)
+    game.record.tags['White'] = 'Checkers-AI'
+    thinking = None
 
     while run:
         clock.tick(FPS)
-        depth = 6
-        if game.turn == WHITE:
-            #value, new_board = minimax(game.get_board(), depth, True, game, 2, WHITE, BLACK)
+        if game.turn == WHITE and thinking is None:
+            #value, new_board = minimax(game.get_board(), DEPTH, True, game, 2, WHITE, BLACK)
             #new_board = monte_carlo_tree_search(game.get_board(), True, WHITE, game, 10, 1, 6)
-            value, new_board = alpha_beta(game.get_board(), depth, True, game, 2, WHITE, BLACK, neg_inf, pos_inf)
+            #value, new_board = alpha_beta(game.get_board(), DEPTH, True, game, 2, WHITE, BLACK,
+            #                              float('-inf'), float('inf'))
+            #value, new_board, depth = iterative_deepening(game.get_board(), MOVE_TIME, game, 2, WHITE, BLACK,
+            #                                              tablebase=tablebase)
+            new_board = book.play(game.get_board(), WHITE) if book is not None else None
+            if new_board is not None:
+                game.ai_move(new_board)
+                game.update()
+                game.change_turn()
+            else:
+                thinking = engine.think(game.get_board())
+
+        if thinking is not None and thinking.done():
+            value, new_board, depth = thinking.result()
+            thinking = None
             if new_board:
                 game.ai_move(new_board)
+                # think about the expected reply while the player moves
+                engine.ponder(new_board)
             else:
                 print("WINNER: BLACK")
+                game.record.result = pdn.RESULTS[BLACK]
                 game.update()
                 break
             game.update()
             game.change_turn()
 
         # if game.turn == BLACK:
-            # value, new_board = minimax(game.get_board(), depth, True, game, 2, BLACK, WHITE)
-            #value, new_board = alpha_beta(game.get_board(), depth, True, game, 3, BLACK, WHITE, neg_inf, pos_inf)
+            # value, new_board = minimax(game.get_board(), DEPTH, True, game, 2, BLACK, WHITE)
+            #value, new_board = alpha_beta(game.get_board(), DEPTH, True, game, 3, BLACK, WHITE,
+            #                              float('-inf'), float('inf'))
             # if new_board:
             #     game.ai_move(new_board)
             # else:
@@ -58,26 +100,48 @@ def main():
             # game.update()
             # game.change_turn()
 
-        if game.winner():
+        winner = game.winner()
+        if winner == DRAW:
+            print("DRAW")
+            game.update()
+            break
+        if winner:
             print("WINNER: ")
-            print(("BLACK" if game.winner() == BLACK else "WHITE"))
+            print(("BLACK" if winner == BLACK else "WHITE"))
             game.update()
             break
 
         text = font.render(("Black" if game.turn == BLACK else "White"), True, DARK_BEIGE)
+        status = None
+        progress = engine.progress()
+        if progress is not None:
+            depth, nodes, seconds = progress
+            status = font.render('%s: depth %d, %d nodes' % ('Pondering' if engine.pondering() else 'Thinking',
+                                                             depth, nodes), True, DARK_BEIGE)
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 run = False
-            if event.type == pygame.MOUSEBUTTONDOWN:
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_r:
+                # new game
+                engine.new_game()
+                thinking = None
+                save_game(game)
+                game.reset()
+                game.record.tags['White'] = 'Checkers-AI'
+            if event.type == pygame.MOUSEBUTTONDOWN and thinking is None:
                 pos = pygame.mouse.get_pos()
                 row, col = get_row_col_from_mouse(pos)
                 game.select(row, col)
             game.update()
         WINDOW.blit(text, (10, 10))
+        if status is not None:
+            WINDOW.blit(status, (10, 35))
 
         game.update()
         pygame.time.delay(10)
 
+    engine.close()
+    save_game(game)
     pygame.time.delay(10000)
     pygame.quit()
 
@@ -1,9 +1,20 @@
-from checkers.constants import WHITE
-from checkers import simulation
-import random
+from checkers.constants import BLACK
+from checkers.board import WIN_SCORE, DRAW_SCORE
+from checkers import simulation, zobrist
+from checkers.stats import SearchStats
+from .transposition import TranspositionTable, EXACT, LOWER, UPPER
+from .ordering import MoveOrderer
+import time
 
 
-def alpha_beta(board, depth, max_player, game, heuristic, max_color, min_color, alpha, beta):
+class SearchTimeout(Exception):
+    """
+    Raised inside a search when its deadline has passed. The searched board is left mid-search
+    """
+
+
+def alpha_beta(board, depth, max_player, game, heuristic, max_color, min_color, alpha, beta, tt=None, stats=None,
+               tablebase=None):
     """
     Create a minimax tree by recursively exploring every legal move till max depth is reached. We pass down our alpha and beta
     values and measure if, depending if we are maximizing or minimizing, if a min or max value already explored in the tree has been
@@ -11,6 +22,8 @@ def alpha_beta(board, depth, max_player, game, heuristic, max_color, min_color,
     recurse back up the tree and at each node assign either the maximimum or minimum value of its children till reaching the root.
     The root, which in this use case will always be maximizing, then chooses the move that gives the maximum value and returns that value and a
     new board.
+    Moves are made and unmade on board in place, only the returned board is newly created. Positions reached through
+    different move orders are looked up in a transposition table.
     :param board: current board
     :param depth: max depth to extend the minimax tree
     :param max_player: if we are maximizing
@@ -20,59 +33,175 @@ def alpha_beta(board, depth, max_player, game, heuristic, max_color, min_color,
     :param min_color: color to minimize on
     :param alpha: alpha value (starting at -inf)
     :param beta: beta value (starting at inf)
+    :param tt: TranspositionTable to use (and keep) across searches, a new one is made if None
+    :param stats: SearchStats to count the work of the search into
+    :param tablebase: checkers.tablebase.Tablebase to score positions with few pieces
     :return: best evaluation score and the new board generated from best move
     """
-    r = [0, 1]
-
-    if depth == 0 or board.winner():
-        if max_color == WHITE:
-            if heuristic == 2:
-                return board.white_heuristic_eval_2(), board
-            elif heuristic == 1:
-                return board.white_heuristic_eval_1(), board
-            elif heuristic == 3:
-                return board.white_heuristic_eval_3(), board
-        else:
-            if heuristic == 2:
-                return board.black_heuristic_eval_2(), board
-            elif heuristic == 1:
-                return board.black_heuristic_eval_1(), board
-            elif heuristic == 3:
-                return board.black_heuristic_eval_3(), board
-
-    if max_player:
-        maxEval = float('-inf')
-        best_move = None
-        for move in simulation.get_all_moves(board, max_color):
-            evaluation = alpha_beta(move, depth - 1, False, game, heuristic, max_color, min_color, alpha, beta)[0]
-            alpha = max(alpha, evaluation)
-            if maxEval == evaluation and best_move is not None:
-                if random.choice(r) == 1:
-                    best_move = best_move
-            else:
-                maxEval = max(maxEval, evaluation)
-                if maxEval == evaluation:
+    search = AlphaBeta(heuristic, max_color, min_color, tt, stats=stats, tablebase=tablebase)
+    start = time.perf_counter()
+    value, move = search.search(board, depth, max_player, alpha, beta)
+    search.stats.time += time.perf_counter() - start
+    if move is None:
+        return value, (board if depth == 0 or board.winner() else None)
+
+    search.stats.boards += 1
+    new_board = board.copy()
+    new_board.make_move(move)
+    return value, new_board
+
+
+class AlphaBeta:
+    """
+    Alpha beta search over a board using make_move/unmake_move, with a transposition table probed before generating moves
+    and moves ordered by a MoveOrderer
+    """
+
+    def __init__(self, heuristic, max_color, min_color, tt=None, deadline=None, orderer=None, stats=None,
+                 tablebase=None):
+        """
+        :param heuristic: the heuristic evaluation function to give our leaf nodes
+        :param max_color: color to maximize on
+        :param min_color: color to minimize on
+        :param tt: TranspositionTable, a new one is made if None
+        :param deadline: time.perf_counter() value after which the search raises SearchTimeout, None for no limit.
+        Setting stopped raises it too while there is a deadline
+        :param orderer: MoveOrderer, a new one is made if None
+        :param stats: SearchStats to count into, a new one is made if None
+        :param tablebase: checkers.tablebase.Tablebase, positions it holds are scored from it below the root
+        """
+        self.evaluate = simulation.get_heuristic(heuristic, max_color)
+        self.max_color = max_color
+        self.min_color = min_color
+        self.tt = tt if tt is not None else TranspositionTable()
+        self.deadline = deadline
+        self.orderer = orderer if orderer is not None else MoveOrderer()
+        # moves to try first, by position key (principal variation of a previous search)
+        self.pv = {}
+        self.stats = stats if stats is not None else SearchStats()
+        self.tablebase = tablebase
+        # set from another thread to end the search like a passed deadline
+        self.stopped = False
+
+    def search(self, board, depth, max_player, alpha, beta, ply=0):
+        """
+        :param board: board to search, restored when the search returns
+        :param depth: depth to search
+        :param max_player: if max_color is to move
+        :param alpha: alpha value
+        :param beta: beta value
+        :param ply: distance from the root
+        :return: best evaluation score and the best Move (None at leaf nodes)
+        """
+        stats = self.stats
+        stats.nodes += 1
+        deadline = self.deadline
+        if deadline is not None and not stats.nodes & 255 and (self.stopped or time.perf_counter() > deadline):
+            raise SearchTimeout()
+
+        tablebase = self.tablebase
+        if tablebase is not None and ply and board.white_left + board.black_left <= tablebase.pieces:
+            score = tablebase.score(board, self.max_color if max_player else self.min_color, self.max_color, ply)
+            if score is not None:
+                stats.tablebase_hits += 1
+                return score, None
+
+        if ply and board.is_draw():
+            return DRAW_SCORE, None
+        if board.winner():
+            # the side to move has no pieces left
+            return (ply - WIN_SCORE if max_player else WIN_SCORE - ply), None
+        if depth == 0:
+            stats.evaluations += 1
+            return self.evaluate(board), None
+
+        color = self.max_color if max_player else self.min_color
+        key = board.hash ^ zobrist.BLACK_TO_MOVE if color == BLACK else board.hash
+        entry = self.tt.probe(key, ply)
+        stats.tt_probes += 1
+        tt_move = None
+        if entry is not None:
+            stats.tt_hits += 1
+            _, entry_depth, flag, score, tt_move = entry
+            if entry_depth >= depth:
+                if flag == EXACT:
+                    return score, tt_move
+                if flag == LOWER:
+                    alpha = max(alpha, score)
+                else:
+                    beta = min(beta, score)
+                if beta <= alpha:
+                    return score, tt_move
+        alpha_start, beta_start = alpha, beta
+
+        first = tt_move if tt_move is not None else self.pv.get(key)
+        moves = self.orderer.order(board, color, ply, first)
+
+        if max_player:
+            maxEval = float('-inf')
+            best_move = None
+            for index, move in enumerate(moves):
+                undo = board.make_move(move)
+                evaluation = self.search(board, depth - 1, False, alpha, beta, ply + 1)[0]
+                board.unmake_move(undo)
+                if best_move is None or evaluation > maxEval:
+                    maxEval = evaluation
                     best_move = move
-            if beta <= alpha:
-                break
+                alpha = max(alpha, evaluation)
+                if beta <= alpha:
+                    self.orderer.cutoff(move, ply, depth, index)
+                    stats.cutoff(index)
+                    break
+            value = maxEval
 
-        return maxEval, best_move
-
-    else:
-        minEval = float('inf')
-        best_move = None
-        for move in simulation.get_all_moves(board, min_color):
-            evaluation = alpha_beta(move, depth - 1, True, game, heuristic, max_color, min_color, alpha, beta)[0]
-            beta = min(beta, evaluation)
-
-            if minEval == evaluation and best_move is not None:
-                if random.choice(r) == 0:
-                    best_move = best_move
-            else:
-                minEval = min(minEval, evaluation)
-                if minEval == evaluation:
+        else:
+            minEval = float('inf')
+            best_move = None
+            for index, move in enumerate(moves):
+                undo = board.make_move(move)
+                evaluation = self.search(board, depth - 1, True, alpha, beta, ply + 1)[0]
+                board.unmake_move(undo)
+                if best_move is None or evaluation < minEval:
+                    minEval = evaluation
                     best_move = move
-            if beta <= alpha:
-                break
+                beta = min(beta, evaluation)
+                if beta <= alpha:
+                    self.orderer.cutoff(move, ply, depth, index)
+                    stats.cutoff(index)
+                    break
+            value = minEval
 
-        return minEval, best_move
+        if best_move is None:
+            # the side to move has no legal move and has lost
+            return (ply - WIN_SCORE if max_player else WIN_SCORE - ply), None
+        if value <= alpha_start:
+            flag = UPPER
+        elif value >= beta_start:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.tt.store(key, depth, flag, value, best_move, ply)
+        return value, best_move
+
+    def principal_variation(self, board, max_player, depth):
+        """
+        Follow the best moves stored in the transposition table from board
+        :param board: root of the search, left unchanged
+        :param max_player: if max_color is to move at the root
+        :param depth: maximum number of moves to follow
+        :return: [(position key, Move)] from the root
+        """
+        pv = []
+        undos = []
+        for _ in range(depth):
+            color = self.max_color if max_player else self.min_color
+            key = board.hash ^ zobrist.BLACK_TO_MOVE if color == BLACK else board.hash
+            entry = self.tt.probe(key)
+            if entry is None or entry[4] is None or entry[4] not in board.generate_moves(color):
+                break
+            pv.append((key, entry[4]))
+            undos.append(board.make_move(entry[4]))
+            max_player = not max_player
+        for undo in reversed(undos):
+            board.unmake_move(undo)
+        return pv
@@ -0,0 +1,166 @@
+"""
+Iterative deepening alpha beta on a background thread, so that a game loop keeps handling events and drawing while the
+engine thinks, and the engine can think on the opponent's time.
+
+    engine = AsyncSearch(2, WHITE, BLACK, 1000)
+    future = engine.think(board)         # returns at once
+    ...
+    if future.done():
+        value, new_board, depth = future.result()
+        engine.ponder(new_board)         # search the expected reply until the opponent moves
+"""
+from checkers import zobrist
+from .alpha_beta import AlphaBeta
+from .iterative_deepening import deepen
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+
+
+class AsyncSearch:
+    """
+    Background search of the moves of max_color. One search runs at a time, starting a search or pondering stops the
+    running one. Pondering searches the position after the reply the last search expects; when the opponent plays it,
+    think hands back the pondering search, which goes on for the time of a move from the depth it had reached.
+    Every search of a game runs on the same AlphaBeta, so the transposition table and move ordering history of the
+    previous moves and of pondering carry over, even when the opponent plays another reply
+    """
+
+    def __init__(self, heuristic, max_color, min_color, time_budget, max_depth=64, tablebase=None):
+        """
+        :param heuristic: the heuristic evaluation function to give our leaf nodes
+        :param max_color: color the engine plays
+        :param min_color: color of the opponent
+        :param time_budget: time to search a move in milliseconds
+        :param max_depth: deepest search to try
+        :param tablebase: checkers.tablebase.Tablebase to score positions with few pieces
+        """
+        self.heuristic = heuristic
+        self.max_color = max_color
+        self.min_color = min_color
+        self.time_budget = time_budget
+        self.max_depth = max_depth
+        self.tablebase = tablebase
+        self.executor = ThreadPoolExecutor(1)
+        # AlphaBeta of every search of the game, and the Future of the running one
+        self.search = None
+        self.future = None
+        # position key searched while pondering, None when not pondering
+        self.ponder_key = None
+        self.ponder_hits = 0
+        # stops the pondering search after a ponder hit
+        self.timer = None
+        # (start time, nodes and completed depths of search.stats before it) of the running search
+        self.start = (0.0, 0, 0)
+        self.new_game()
+
+    def new_game(self):
+        """
+        Stop searching and forget what the searches of the game learned
+        """
+        self.cancel()
+        # a new AlphaBeta, a cancelled search may still be unwinding on the old one
+        self.search = AlphaBeta(self.heuristic, self.max_color, self.min_color, tablebase=self.tablebase)
+
+    def think(self, board):
+        """
+        Start searching the best move of max_color
+        :param board: board with max_color to move (not changed)
+        :return: Future of (best evaluation score, new board after the best move or None, depth it came from)
+        """
+        if self.ponder_key is not None and self.ponder_key == zobrist.position_key(board, self.max_color):
+            # the opponent played the expected reply
+            self.ponder_hits += 1
+            self.ponder_key = None
+            if not self.future.done():
+                self.timer = threading.Timer(self.time_budget / 1000, self._stop, (self.search, self.future))
+                self.timer.start()
+            return self.future
+        self.cancel()
+        self.future = self.executor.submit(self._run, self.search, board.copy(), self.time_budget / 1000)
+        return self.future
+
+    def ponder(self, board):
+        """
+        Search on the opponent's time, until think or cancel is called
+        :param board: board after the engine's move, min_color to move (not changed)
+        :return: the reply being pondered, or None if the last search did not find one
+        """
+        self.cancel()
+        search = self.search
+        expected = search.principal_variation(board, False, 1)
+        if not expected:
+            return None
+        position = board.copy()
+        position.make_move(expected[0][1])
+        if position.winner() is not None:
+            return None
+        self.ponder_key = zobrist.position_key(position, self.max_color)
+        self.future = self.executor.submit(self._run, search, position, None)
+        return expected[0][1]
+
+    def _run(self, search, board, time_budget):
+        """
+        Worker task: iterative deepening of search on board
+        :param time_budget: seconds to search, None to search until stopped
+        :return: (best evaluation score, new board after the best move or None, depth it came from)
+        """
+        search.stopped = False
+        search.tt.new_search()
+        stats = search.stats
+        self.start = (time.perf_counter(), stats.nodes, len(stats.depth_times))
+        deadline = self.start[0] + time_budget if time_budget is not None else float('inf')
+        stats.boards += 1
+        value, best_move, completed = deepen(search, board.copy(), deadline, self.max_depth)
+        stats.time += time.perf_counter() - self.start[0]
+        if best_move is None:
+            return value, (board if board.winner() else None), completed
+        stats.boards += 1
+        board.make_move(best_move)
+        return value, board, completed
+
+    @staticmethod
+    def _stop(search, future):
+        if not future.done():
+            search.stopped = True
+
+    def cancel(self):
+        """
+        Stop the running search or pondering, its Future is left cancelled or with the deepest result it completed
+        """
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        if self.future is not None:
+            self.future.cancel()
+            if self.search is not None:
+                self.search.stopped = True
+        self.future = None
+        self.ponder_key = None
+
+    def busy(self):
+        return self.future is not None and not self.future.done()
+
+    def pondering(self):
+        return self.ponder_key is not None and self.busy()
+
+    def progress(self):
+        """
+        :return: (depth being searched, nodes searched, seconds) of the running search, None when idle
+        """
+        if not self.busy():
+            return None
+        start, nodes, depths = self.start
+        stats = self.search.stats
+        depth = stats.depth_times[-1][0] + 1 if len(stats.depth_times) > depths else 1
+        return depth, stats.nodes - nodes, time.perf_counter() - start
+
+    def close(self):
+        self.cancel()
+        self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,68 @@
+from .alpha_beta import AlphaBeta, SearchTimeout
+import time
+
+
+def iterative_deepening(board, time_budget, game, heuristic, max_color, min_color, max_depth=64, tt=None,
+                        stats=None, tablebase=None):
+    """
+    Search depth 1, 2, 3... with alpha beta until the time budget runs out and keep the result of the last completed depth.
+    Each depth tries the principal variation of the previous one first, and the transposition table is kept between depths.
+    A depth is not started when the previous one took longer than the time left, as it would not finish.
+    Depth 1 always completes so a legal move is returned even with a tiny budget.
+    :param board: current board (not changed)
+    :param time_budget: time to search in milliseconds
+    :param game: object containing game logic and visual updates
+    :param heuristic: the heuristic evaluation function to give our leaf nodes
+    :param max_color: color to move and maximize on
+    :param min_color: color to minimize on
+    :param max_depth: deepest search to try
+    :param tt: TranspositionTable to use (and keep) across searches, a new one is made if None
+    :param stats: SearchStats to count the work of the search into
+    :param tablebase: checkers.tablebase.Tablebase to score positions with few pieces
+    :return: best evaluation score, the new board generated from best move and the depth it came from
+    """
+    start = time.perf_counter()
+    search = AlphaBeta(heuristic, max_color, min_color, tt, stats=stats, tablebase=tablebase)
+    search.stats.boards += 1
+    value, best_move, completed = deepen(search, board.copy(), start + time_budget / 1000, max_depth)
+    search.stats.time += time.perf_counter() - start
+
+    if best_move is None:
+        return value, (board if board.winner() else None), completed
+
+    search.stats.boards += 1
+    new_board = board.copy()
+    new_board.make_move(best_move)
+    return value, new_board, completed
+
+
+def deepen(search, root, deadline, max_depth=64, depth_offset=0):
+    """
+    Iterative deepening loop of an AlphaBeta search, with the root maximizing
+    :param search: AlphaBeta to run, its transposition table and move orderer are kept between depths
+    :param root: board to search, left mid-search when the deadline passes
+    :param deadline: time.perf_counter() value to stop at
+    :param max_depth: deepest search to try
+    :param depth_offset: added to every depth searched (the first depth still always completes)
+    :return: best evaluation score, best Move and depth of the last completed search
+    """
+    value, best_move, completed = None, None, 0
+    for depth in range(1 + depth_offset, max_depth + 1):
+        iteration_start = time.perf_counter()
+        search.deadline = deadline if completed else None
+        search.orderer.new_search()
+        try:
+            value, best_move = search.search(root, depth, True, float('-inf'), float('inf'))
+        except SearchTimeout:
+            break
+        completed = depth
+        search.stats.depth_done(depth, time.perf_counter() - iteration_start)
+        if best_move is None:
+            break
+
+        search.pv = dict(search.principal_variation(root, True, depth))
+        now = time.perf_counter()
+        if now - iteration_start > deadline - now:
+            break
+
+    return value, best_move, completed
@@ -0,0 +1,125 @@
+from checkers.board import Board
+from checkers.constants import WHITE, BLACK
+from checkers.stats import SearchStats
+from .alpha_beta import AlphaBeta
+from .ordering import MoveOrderer
+from .iterative_deepening import deepen
+from .shared_transposition import SharedTranspositionTable
+from concurrent.futures import ProcessPoolExecutor
+import time
+import os
+
+# the shared table as attached by a worker process (set by _init_worker)
+_table = None
+
+
+def lazy_smp(board, time_limit, workers=None, game=None, heuristic=2, max_color=WHITE, min_color=BLACK,
+             tt_size=1 << 20, stats=None):
+    """
+    Search one position with several processes sharing a transposition table. See LazySMP
+    :param board: current board
+    :param time_limit: time to search in milliseconds
+    :param workers: number of worker processes (os.cpu_count() if None)
+    :param game: object containing game logic and visual updates
+    :param heuristic: the heuristic evaluation function to give our leaf nodes
+    :param max_color: color to move and maximize on
+    :param min_color: color to minimize on
+    :param tt_size: number of entries of the shared transposition table
+    :param stats: SearchStats to add the work of every worker to
+    :return: best evaluation score, the new board generated from best move and the depth it came from
+    """
+    with LazySMP(workers, tt_size) as search:
+        return search.search(board, time_limit, heuristic, max_color, min_color, stats=stats)
+
+
+class LazySMP:
+    """
+    Lazy SMP: every worker process runs its own iterative deepening alpha beta on the same position, all of them
+    storing into and probing one SharedTranspositionTable. Odd workers search one ply deeper than even ones at every
+    iteration and every worker but the first shuffles its quiet moves, so they spread over different parts of the tree
+    and fill the table for each other. The move of the deepest completed search is played.
+    The pool and table are kept between searches
+    """
+
+    def __init__(self, workers=None, tt_size=1 << 20):
+        """
+        :param workers: number of worker processes (os.cpu_count() if None)
+        :param tt_size: number of entries of the shared transposition table
+        """
+        self.workers = workers or os.cpu_count()
+        self.table = SharedTranspositionTable(tt_size)
+        self.executor = ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                            initargs=(self.table.name, self.table.mask + 1))
+        # table scores are only valid for one heuristic and max color
+        self.scoring = None
+
+    def search(self, board, time_limit, heuristic, max_color, min_color, max_depth=64, stats=None):
+        """
+        :param board: current board
+        :param time_limit: time to search in milliseconds
+        :param heuristic: the heuristic evaluation function to give our leaf nodes
+        :param max_color: color to move and maximize on
+        :param min_color: color to minimize on
+        :param max_depth: deepest search to try
+        :param stats: SearchStats to add the work of every worker to
+        :return: best evaluation score, the new board generated from best move and the depth it came from
+        """
+        start = time.perf_counter()
+        stats = stats if stats is not None else SearchStats()
+        if self.scoring != (heuristic, max_color):
+            self.table.clear()
+            self.scoring = (heuristic, max_color)
+
+        deadline = time.time() + time_limit / 1000
+        position = board.to_bytes(max_color)
+        futures = [self.executor.submit(_search, position, index, deadline, heuristic, max_depth)
+                   for index in range(self.workers)]
+        results = [future.result() for future in futures]
+        for result in results:
+            stats.merge(result[3])
+        stats.time += time.perf_counter() - start
+
+        # deepest completed search wins, the lowest worker index breaks ties
+        completed, value, move_key, _ = max(results, key=lambda result: result[0])
+        if move_key is None:
+            return value, (board if board.winner() else None), completed
+
+        stats.boards += 1
+        new_board = board.copy()
+        new_board.make_move(next(move for move in board.generate_moves(max_color) if move.key == move_key))
+        return value, new_board, completed
+
+    def close(self):
+        self.executor.shutdown()
+        self.table.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _init_worker(name, size):
+    global _table
+    _table = SharedTranspositionTable(size, name=name)
+
+
+def _search(position, index, deadline, heuristic, max_depth):
+    """
+    Worker task: iterative deepening with the shared table until the deadline
+    :param position: Board.to_bytes of the root, with the max color to move
+    :param index: worker number, picks the depth offset and move order
+    :param deadline: time.time() value to stop at
+    :param heuristic: the heuristic evaluation function to give our leaf nodes
+    :param max_depth: deepest search to try
+    :return: (depth completed, score, Move.key of the best move or None, SearchStats.as_dict())
+    """
+    root, max_color = Board.from_bytes(position)
+    min_color = BLACK if max_color == WHITE else WHITE
+    orderer = MoveOrderer(seed=index if index else None)
+    search = AlphaBeta(heuristic, max_color, min_color, tt=_table, orderer=orderer)
+    search.stats.boards += 1
+    value, move, completed = deepen(search, root, time.perf_counter() + deadline - time.time(),
+                                    max_depth, depth_offset=index % 2)
+    return completed, value, move.key if move is not None else None, search.stats.as_dict()
@@ -1,14 +1,16 @@
-from checkers.constants import WHITE
+from checkers.board import WIN_SCORE, DRAW_SCORE
 from checkers import simulation
-import random
+from checkers.stats import SearchStats
+import time
 
 
-def minimax(board, depth, max_player, game, heuristic, max_color, min_color):
+def minimax(board, depth, max_player, game, heuristic, max_color, min_color, stats=None):
     """
     Create a minimax tree by recursively exploring every legal move till max depth is reached. Evaluate the leaf nodes using a heuristic
     recurse back up the tree and at each node assign either the maximimum or minimum value of its children till reaching the root.
     The root, which in this use case will always be maximizing, then chooses the move that gives the maximum value and returns that value and a
     new board.
+    Moves are made and unmade on board in place, only the returned board is newly created.
     :param board: current board
     :param depth: max depth to extend the minimax tree
     :param max_player: if we are maximizing
@@ -16,53 +18,65 @@ def minimax(board, depth, max_player, game, heuristic, max_color, min_color):
     :param heuristic: the heuristic evaluation function to give our leaf nodes
     :param max_color: color to maximize on
     :param min_color: color to minimize on
+    :param stats: SearchStats to count the work of the search into
     :return: best evaluation score and the new board generated from best move
     """
-    r = [0, 1]
-    if depth == 0 or board.winner():
-        if max_color == WHITE:
-            if heuristic == 2:
-                return board.white_heuristic_eval_2(), board
-            elif heuristic == 1:
-                return board.white_heuristic_eval_1(), board
-            elif heuristic == 3:
-                return board.white_heuristic_eval_3(), board
-        else:
-            if heuristic == 2:
-                return board.black_heuristic_eval_2(), board
-            elif heuristic == 1:
-                return board.black_heuristic_eval_1(), board
-            elif heuristic == 3:
-                return board.black_heuristic_eval_3(), board
+    stats = stats if stats is not None else SearchStats()
+    evaluate = simulation.get_heuristic(heuristic, max_color)
+    start = time.perf_counter()
+    value, move = _minimax(board, depth, max_player, evaluate, max_color, min_color, stats, 0)
+    stats.time += time.perf_counter() - start
+    if move is None:
+        return value, (board if depth == 0 or board.winner() else None)
+
+    stats.boards += 1
+    new_board = board.copy()
+    new_board.make_move(move)
+    return value, new_board
+
+
+def _minimax(board, depth, max_player, evaluate, max_color, min_color, stats, ply):
+    """
+    Minimax search over board using make_move/unmake_move. Finished games below the root score as in AlphaBeta
+    :param ply: distance from the root
+    :return: best evaluation score and the best Move (None at leaf nodes)
+    """
+    stats.nodes += 1
+    if ply and board.is_draw():
+        return DRAW_SCORE, None
+    if board.winner():
+        return (ply - WIN_SCORE if max_player else WIN_SCORE - ply), None
+    if depth == 0:
+        stats.evaluations += 1
+        return evaluate(board), None
 
     if max_player:
         maxEval = float('-inf')
         best_move = None
-        for move in simulation.get_all_moves(board, max_color):
-            evaluation = minimax(move, depth - 1, False, game, heuristic, max_color, min_color)[0]
-
-            if maxEval == evaluation and best_move is not None:
-                if random.choice(r) == 1:
-                    best_move = best_move
-            else:
-                maxEval = max(maxEval, evaluation)
-                if maxEval == evaluation:
-                    best_move = move
+        for move in board.generate_moves(max_color):
+            undo = board.make_move(move)
+            evaluation = _minimax(board, depth - 1, False, evaluate, max_color, min_color, stats, ply + 1)[0]
+            board.unmake_move(undo)
+            if best_move is None or evaluation > maxEval:
+                maxEval = evaluation
+                best_move = move
 
+        if best_move is None:
+            # no legal move, a loss
+            return ply - WIN_SCORE, None
         return maxEval, best_move
 
     else:
         minEval = float('inf')
         best_move = None
-        for move in simulation.get_all_moves(board, min_color):
-            evaluation = minimax(move, depth - 1, True, game, heuristic, max_color, min_color)[0]
-
-            if minEval == evaluation and best_move is not None:
-                if random.choice(r) == 0:
-                    best_move = best_move
-            else:
-                minEval = min(minEval, evaluation)
-                if minEval == evaluation:
-                    best_move = move
+        for move in board.generate_moves(min_color):
+            undo = board.make_move(move)
+            evaluation = _minimax(board, depth - 1, True, evaluate, max_color, min_color, stats, ply + 1)[0]
+            board.unmake_move(undo)
+            if best_move is None or evaluation < minEval:
+                minEval = evaluation
+                best_move = move
 
+        if best_move is None:
+            return WIN_SCORE - ply, None
         return minEval, best_move
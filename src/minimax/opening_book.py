@@ -0,0 +1,152 @@
+"""
+Opening book: the best move of the positions every game goes through in its first moves, found by deep searches
+ahead of time so the engine does not search them again in every game.
+
+    python -m minimax.opening_book --plies 8 --depth 8 --out opening_book.bin
+
+For both colors, the book follows every reply of the opponent and the searched best move of its own side from the
+starting position. Each position of the side to move keeps its best move and statistics (score, search depth and
+number of book lines through it) in a file of sorted position keys (see checkers.keyfile).
+"""
+from checkers.board import Board
+from checkers.constants import WHITE, BLACK
+from checkers import keyfile, zobrist
+from .alpha_beta import AlphaBeta
+from .iterative_deepening import deepen
+from .transposition import TranspositionTable
+import argparse
+import struct
+import time
+import sys
+
+MAGIC = b'CKOB'
+VERSION = 1
+# start square, end square, search depth, score for the side to move, number of book lines through the position
+RECORD = struct.Struct('<BBBxfI')
+
+
+def build(plies=8, depth=8, heuristic=2, log=None):
+    """
+    Search the book positions
+    :param plies: moves from the starting position covered by the book
+    :param depth: depth of the searches
+    :param heuristic: the heuristic evaluation function of the searches
+    :param log: file to write progress to, None for silence
+    :return: {position key: (Move, score, depth, lines)} for the side to move
+    """
+    book = {}
+    for color in (BLACK, WHITE):
+        other = WHITE if color == BLACK else BLACK
+        search = AlphaBeta(heuristic, color, other, TranspositionTable())
+        start = time.perf_counter()
+        # position key -> [board, color to move, move orders reaching it], a position is searched once
+        layer = {zobrist.position_key(Board(), BLACK): [Board(), BLACK, 1]}
+        for ply in range(plies):
+            next_layer = {}
+            for key, (board, to_move, lines) in layer.items():
+                next_color = WHITE if to_move == BLACK else BLACK
+                if to_move == color:
+                    score, move, searched = deepen(search, board, float('inf'), depth)
+                    if move is None:
+                        continue
+                    book[key] = move, score, searched, lines
+                    moves = [move]
+                else:
+                    moves = board.generate_moves(to_move)
+                for move in moves:
+                    child = board.copy()
+                    child.make_move(move)
+                    if child.winner() is None:
+                        child_key = zobrist.position_key(child, next_color)
+                        if child_key in next_layer:
+                            next_layer[child_key][2] += lines
+                        else:
+                            next_layer[child_key] = [child, next_color, lines]
+            layer = next_layer
+            if log is not None:
+                print('%s ply %d: %d positions, %d in book, %.1fs' % (
+                    'black' if color == BLACK else 'white', ply + 1, len(layer), len(book),
+                    time.perf_counter() - start), file=log)
+    return book
+
+
+def write(path, plies, book):
+    """
+    Write an opening book file
+    :param path: file to write
+    :param plies: moves from the starting position covered by the book
+    :param book: build() result
+    """
+    keys = sorted(book)
+    records = []
+    for key in keys:
+        move, score, depth, lines = book[key]
+        records.append(RECORD.pack(move.start.bit_length() - 1, move.end.bit_length() - 1, depth, score, lines))
+    keyfile.write(path, MAGIC, VERSION, plies, keys, records)
+
+
+class OpeningBook:
+    """
+    Opening book file, memory-mapped (see checkers.keyfile)
+    """
+
+    def __init__(self, path):
+        """
+        :param path: file written by write
+        """
+        self.path = path
+        self.file = keyfile.KeyFile(path, MAGIC, VERSION, RECORD.size)
+        self.plies = self.file.parameter
+
+    def lookup(self, board, color):
+        """
+        :param board: Board
+        :param color: color to move
+        :return: (Move, score, depth, lines) of the position, or None if it is not in the book
+        """
+        number = self.file.find(zobrist.position_key(board, color))
+        if number < 0:
+            return None
+        start, end, depth, score, lines = RECORD.unpack(self.file.record(number))
+        key = (1 << start) << 32 | 1 << end
+        for move in board.generate_moves(color):
+            if move.key == key:
+                return move, score, depth, lines
+        # a key collision, the book move is not a move of this position
+        return None
+
+    def probe(self, board, color):
+        """
+        :param board: Board
+        :param color: color to move
+        :return: book Move of the position, None if it is not in the book
+        """
+        entry = self.lookup(board, color)
+        return entry[0] if entry is not None else None
+
+    def play(self, board, color):
+        """
+        :param board: Board (not changed)
+        :param color: color to move
+        :return: new board after the book move, None if the position is not in the book
+        """
+        move = self.probe(board, color)
+        if move is None:
+            return None
+        new_board = board.copy()
+        new_board.make_move(move)
+        return new_board
+
+    def close(self):
+        self.file.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build an opening book by searching the first moves of the game')
+    parser.add_argument('--plies', type=int, default=8, help='moves from the starting position covered by the book')
+    parser.add_argument('--depth', type=int, default=8, help='depth of the searches')
+    parser.add_argument('--heuristic', type=int, default=2, choices=(1, 2, 3))
+    parser.add_argument('--out', default='opening_book.bin')
+    args = parser.parse_args()
+    positions = build(args.plies, args.depth, args.heuristic, log=sys.stderr)
+    write(args.out, args.plies, positions)
@@ -0,0 +1,109 @@
+from checkers.bitboard import popcount
+import random
+
+# history scores are halved when one passes this
+HISTORY_LIMIT = 1 << 20
+
+
+class MoveOrderer:
+    """
+    Orders moves for alpha beta and keeps the killer moves and history heuristic it orders with.
+    Also counts beta cutoffs by the index of the move that caused them to measure how well the ordering works
+    """
+
+    def __init__(self, killers=2, seed=None):
+        """
+        :param killers: number of killer moves kept per ply
+        :param seed: if not None, quiet moves with equal history scores are shuffled with this seed
+        (lets parallel searchers of one position explore in different orders)
+        """
+        self.killer_slots = killers
+        self.random = random.Random(seed) if seed is not None else None
+        # per ply, the quiet moves that caused the latest cutoffs
+        self.killers = []
+        # move key -> score, raised by depth squared on every cutoff
+        self.history = {}
+        self.cutoffs = []
+
+    def order(self, board, color, ply, first=None):
+        """
+        Generate the moves of a position best first, in stages so that no more moves are generated than the search needs:
+        captures (longest multi-jumps first), the transposition table or principal variation move, killer moves, then
+        the remaining moves by history score
+        :param board: board to move on, may be changed between moves as long as it is restored
+        :param color: color to move
+        :param ply: distance from the root
+        :param first: transposition table or principal variation move, or None
+        :return: generator of Move
+        """
+        first_key = first.key if first is not None else None
+        captures = list(board.generate_captures(color))
+        if captures:
+            captures.sort(key=lambda move: 2 * popcount(move.captured) + (move.key == first_key), reverse=True)
+            for move in captures:
+                yield move
+
+        tried = set()
+        if first is not None and not first.captured and board.is_legal(first, color):
+            tried.add(first_key)
+            yield first
+
+        if ply < len(self.killers):
+            for killer in self.killers[ply]:
+                if killer.key not in tried and board.is_legal(killer, color):
+                    tried.add(killer.key)
+                    yield killer
+
+        history = self.history
+        quiet = [move for move in board.generate_quiet(color) if move.key not in tried]
+        if self.random is not None:
+            self.random.shuffle(quiet)
+        quiet.sort(key=lambda move: history.get(move.key, 0), reverse=True)
+        for move in quiet:
+            yield move
+
+    def cutoff(self, move, ply, depth, index):
+        """
+        Record a beta cutoff
+        :param move: move that caused the cutoff
+        :param ply: distance from the root
+        :param depth: depth left below the node
+        :param index: position of move in the ordered moves
+        """
+        while len(self.cutoffs) <= index:
+            self.cutoffs.append(0)
+        self.cutoffs[index] += 1
+        if move.captured:
+            return
+
+        while len(self.killers) <= ply:
+            self.killers.append([])
+        killers = self.killers[ply]
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[self.killer_slots:]
+
+        score = self.history.get(move.key, 0) + depth * depth
+        self.history[move.key] = score
+        if score > HISTORY_LIMIT:
+            self.age()
+
+    def age(self):
+        """
+        Halve the history scores so recent cutoffs weigh more
+        """
+        self.history = {key: score // 2 for key, score in self.history.items() if score > 1}
+
+    def new_search(self):
+        """
+        Forget the killer moves (they are tied to plies of the previous root) and age the history
+        """
+        self.killers = []
+        self.age()
+
+    def first_move_cutoff_rate(self):
+        """
+        :return: share of cutoffs caused by the first move tried (1.0 is perfect ordering), None without cutoffs
+        """
+        total = sum(self.cutoffs)
+        return self.cutoffs[0] / total if total else None
@@ -0,0 +1,163 @@
+from checkers.board import Board
+from checkers.constants import WHITE, BLACK
+from checkers.stats import SearchStats
+from .alpha_beta import AlphaBeta
+from .ordering import MoveOrderer
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import multiprocessing
+import argparse
+import time
+import os
+
+# alpha of the root search, shared with the worker processes (set by _init_worker)
+_shared_alpha = None
+
+
+def parallel_alpha_beta(board, depth, workers=None, game=None, heuristic=2, max_color=WHITE, min_color=BLACK,
+                        stats=None):
+    """
+    Alpha beta search with the root moves split across a process pool. The root is always maximizing, as in main.
+    See RootParallelSearch
+    :param board: current board
+    :param depth: max depth to extend the minimax tree
+    :param workers: number of worker processes (os.cpu_count() if None)
+    :param game: object containing game logic and visual updates
+    :param heuristic: the heuristic evaluation function to give our leaf nodes
+    :param max_color: color to move and maximize on
+    :param min_color: color to minimize on
+    :param stats: SearchStats to count the work of the search (and of its workers) into
+    :return: best evaluation score and the new board generated from best move
+    """
+    with RootParallelSearch(workers) as search:
+        return search.search(board, depth, heuristic, max_color, min_color, stats)
+
+
+class RootParallelSearch:
+    """
+    Root splitting alpha beta over a ProcessPoolExecutor, keeping the pool alive between searches.
+    Young brothers wait: the first root move is searched here with a full window to get an alpha bound, then the other
+    root moves are searched by the workers. Every result that raises alpha is written to a shared value, and each worker
+    reads the latest alpha when it starts a root move. Positions are sent as Board.to_bytes, moves as Move.key
+    """
+
+    def __init__(self, workers=None):
+        """
+        :param workers: number of worker processes (os.cpu_count() if None)
+        """
+        self.workers = workers or os.cpu_count()
+        self.alpha = multiprocessing.Value('d', float('-inf'))
+        self.executor = ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(self.alpha,))
+
+    def search(self, board, depth, heuristic, max_color, min_color, stats=None):
+        """
+        :param board: current board
+        :param depth: max depth to extend the minimax tree
+        :param heuristic: the heuristic evaluation function to give our leaf nodes
+        :param max_color: color to move and maximize on
+        :param min_color: color to minimize on
+        :param stats: SearchStats to count the work of the search (and of its workers) into
+        :return: best evaluation score and the new board generated from best move
+        """
+        start = time.perf_counter()
+        stats = stats if stats is not None else SearchStats()
+        moves = list(MoveOrderer().order(board, max_color, 0))
+        stats.boards += 1
+        if depth == 0 or board.winner() or not moves:
+            value, move = AlphaBeta(heuristic, max_color, min_color, stats=stats).search(board.copy(), depth, True,
+                                                                                        float('-inf'), float('inf'))
+            stats.time += time.perf_counter() - start
+            return value, (board if depth == 0 or board.winner() else None)
+
+        stats.nodes += 1
+        eldest = board.copy()
+        eldest.make_move(moves[0])
+        best_value = AlphaBeta(heuristic, max_color, min_color, stats=stats).search(eldest, depth - 1, False,
+                                                                                    float('-inf'), float('inf'), 1)[0]
+        best_index = 0
+        with self.alpha.get_lock():
+            self.alpha.value = best_value
+
+        position = board.to_bytes(max_color)
+        pending = {self.executor.submit(_search_root_move, position, move.key, depth, heuristic): index
+                   for index, move in enumerate(moves) if index > 0}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = pending.pop(future)
+                value, worker_stats = future.result()
+                stats.merge(worker_stats)
+                # a value equal to alpha may only be an upper bound, so ties keep the earlier result
+                if value > best_value:
+                    best_value, best_index = value, index
+                    with self.alpha.get_lock():
+                        self.alpha.value = max(self.alpha.value, value)
+
+        stats.boards += 1
+        new_board = board.copy()
+        new_board.make_move(moves[best_index])
+        stats.time += time.perf_counter() - start
+        return best_value, new_board
+
+    def close(self):
+        self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _init_worker(alpha):
+    global _shared_alpha
+    _shared_alpha = alpha
+
+
+def _search_root_move(position, move_key, depth, heuristic):
+    """
+    Worker task: search one root move with the current shared alpha
+    :param position: Board.to_bytes of the root, with the max color to move
+    :param move_key: Move.key of the root move
+    :param depth: depth of the whole search
+    :param heuristic: the heuristic evaluation function to give our leaf nodes
+    :return: score of the move (an upper bound when it is not above the shared alpha) and SearchStats.as_dict()
+    """
+    board, max_color = Board.from_bytes(position)
+    min_color = BLACK if max_color == WHITE else WHITE
+    move = next(move for move in board.generate_moves(max_color) if move.key == move_key)
+    board.make_move(move)
+    alpha = _shared_alpha.value
+    search = AlphaBeta(heuristic, max_color, min_color)
+    search.stats.boards += 1
+    value = search.search(board, depth - 1, False, alpha, float('inf'), 1)[0]
+    return value, search.stats.as_dict()
+
+
+def compare_with_serial(board, depth, workers=None, heuristic=2, max_color=WHITE, min_color=BLACK):
+    """
+    Time the parallel search against the serial alpha beta search on the same position
+    :return: {'serial_time', 'parallel_time', 'speedup', 'serial_value', 'parallel_value', 'workers'}
+    """
+    start = time.perf_counter()
+    serial_value = AlphaBeta(heuristic, max_color, min_color).search(board.copy(), depth, True,
+                                                                    float('-inf'), float('inf'))[0]
+    serial_time = time.perf_counter() - start
+
+    with RootParallelSearch(workers) as search:
+        # a first search starts the worker processes so they are not part of the timing
+        search.search(board, 1, heuristic, max_color, min_color)
+        start = time.perf_counter()
+        parallel_value = search.search(board, depth, heuristic, max_color, min_color)[0]
+        parallel_time = time.perf_counter() - start
+
+    return {'workers': search.workers, 'serial_time': serial_time, 'parallel_time': parallel_time,
+            'speedup': serial_time / parallel_time, 'serial_value': serial_value, 'parallel_value': parallel_value}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare root-parallel alpha beta with the serial search')
+    parser.add_argument('--depth', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--heuristic', type=int, default=2)
+    args = parser.parse_args()
+    print(compare_with_serial(Board(), args.depth, args.workers, args.heuristic))
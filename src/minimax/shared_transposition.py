@@ -0,0 +1,99 @@
+from checkers.move import Move
+from .transposition import score_to_table, score_from_table
+from multiprocessing import shared_memory
+import struct
+
+# entry: check word, score (double), data word
+# data word: depth (8 bits), bound type (2), has move (1), promotion (1), start square (5), end square (5), captured (32)
+# the check word is key ^ score bits ^ data word, so an entry torn by two processes writing at once fails the check
+ENTRY = struct.Struct('<QdQ')
+_SCORE = struct.Struct('<d')
+_BITS = struct.Struct('<Q')
+
+
+class SharedTranspositionTable:
+    """
+    Transposition table stored as a flat array of packed entries in multiprocessing.shared_memory, so that several
+    processes can search with it at once. Writes take no lock: a torn entry fails its check word and reads as a miss.
+    Same interface, stored scores and depth-preferred replacement as TranspositionTable
+    """
+
+    def __init__(self, size=1 << 20, name=None):
+        """
+        :param size: number of entries, rounded down to a power of two
+        :param name: name of an existing table's shared memory to attach to, a new table is created if None
+        """
+        size = 1 << (size.bit_length() - 1)
+        self.mask = size - 1
+        if name is None:
+            self.memory = shared_memory.SharedMemory(create=True, size=size * ENTRY.size)
+            self.owner = True
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)
+            self.owner = False
+        self.name = self.memory.name
+        self.buffer = self.memory.buf
+
+    def _read(self, index):
+        """
+        :return: (key, depth, flag, score, move) of a slot, or None if empty or torn
+        """
+        check, score, data = ENTRY.unpack_from(self.buffer, index * ENTRY.size)
+        depth = data & 0xFF
+        if not depth:
+            return None
+        key = check ^ _BITS.unpack(_SCORE.pack(score))[0] ^ data
+        move = None
+        if data & 0x400:
+            move = Move(1 << ((data >> 12) & 31), 1 << ((data >> 17) & 31), data >> 22, bool(data & 0x800))
+        return key, depth, (data >> 8) & 3, score, move
+
+    def probe(self, key, ply=0):
+        """
+        Look up a position
+        :param key: position hash (with side to move)
+        :param ply: distance of the position from the root of the search
+        :return: (key, depth, bound type, score, best move) or None
+        """
+        entry = self._read(key & self.mask)
+        if entry is not None and entry[0] == key:
+            if ply:
+                return entry[:3] + (score_from_table(entry[3], ply), entry[4])
+            return entry
+        return None
+
+    def store(self, key, depth, flag, score, move, ply=0):
+        """
+        Store a search result unless the slot holds a deeper search of another position
+        :param key: position hash (with side to move)
+        :param depth: depth searched below the position (1 to 255)
+        :param flag: EXACT, LOWER (score is a lower bound) or UPPER (score is an upper bound)
+        :param score: search score
+        :param move: best move found, or None
+        :param ply: distance of the position from the root of the search
+        """
+        index = key & self.mask
+        entry = self._read(index)
+        if entry is not None and entry[0] != key and depth < entry[1]:
+            return
+
+        data = min(depth, 255) | flag << 8
+        if move is not None:
+            data |= (0x400 | (0x800 if move.promotion else 0) | (move.start.bit_length() - 1) << 12 |
+                     (move.end.bit_length() - 1) << 17 | move.captured << 22)
+        score = float(score_to_table(score, ply))
+        check = key ^ _BITS.unpack(_SCORE.pack(score))[0] ^ data
+        ENTRY.pack_into(self.buffer, index * ENTRY.size, check, score, data)
+
+    def clear(self):
+        self.buffer[:] = bytes(len(self.buffer))
+
+    def close(self):
+        """
+        Detach from the shared memory, and free it if this table created it
+        """
+        self.buffer = None
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
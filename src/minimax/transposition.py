@@ -0,0 +1,96 @@
+from checkers.board import WIN_SCORE
+
+EXACT = 0
+LOWER = 1
+UPPER = 2
+# scores beyond this are won or lost games, WIN_SCORE less the plies to the end of the game
+WIN_BOUND = WIN_SCORE // 2
+
+
+def score_to_table(score, ply):
+    """
+    :param score: search score of a position ply plies from the root
+    :param ply: distance of the position from the root
+    :return: score to store, a win or loss counted from the position instead of the root
+    """
+    if score > WIN_BOUND:
+        return score + ply
+    if score < -WIN_BOUND:
+        return score - ply
+    return score
+
+
+def score_from_table(score, ply):
+    """
+    :param score: stored score (see score_to_table)
+    :param ply: distance from the root of the position it is read for
+    :return: search score, a win or loss counted from the root
+    """
+    if score > WIN_BOUND:
+        return score - ply
+    if score < -WIN_BOUND:
+        return score + ply
+    return score
+
+
+class TranspositionTable:
+    """
+    Fixed size hash table of searched positions. Each entry is (key, depth, bound type, score, best move).
+    A slot keeps the deepest search stored in it (depth-preferred replacement), within a generation: a table kept over
+    the moves of a game starts a new generation for every move with new_search, and entries of older generations are
+    replaced by any new one, so deep results of positions left behind do not fill the table.
+    Scores are stored from the point of view of the search's max color and heuristic, so a table should only be shared
+    by searches with the same heuristic and max color. Wins and losses are stored as plies from the stored position,
+    not from the root, so a table kept between searches from different roots gives them at the right distance.
+    """
+
+    def __init__(self, size=1 << 18):
+        """
+        :param size: number of entries, rounded down to a power of two
+        """
+        size = 1 << (size.bit_length() - 1)
+        self.mask = size - 1
+        self.entries = [None] * size
+        self.generations = bytearray(size)
+        self.generation = 0
+
+    def probe(self, key, ply=0):
+        """
+        Look up a position
+        :param key: position hash (with side to move)
+        :param ply: distance of the position from the root of the search
+        :return: (key, depth, bound type, score, best move) or None
+        """
+        entry = self.entries[key & self.mask]
+        if entry is not None and entry[0] == key:
+            if ply:
+                return entry[:3] + (score_from_table(entry[3], ply), entry[4])
+            return entry
+        return None
+
+    def store(self, key, depth, flag, score, move, ply=0):
+        """
+        Store a search result unless the slot holds a deeper search of another position
+        :param key: position hash (with side to move)
+        :param depth: depth searched below the position
+        :param flag: EXACT, LOWER (score is a lower bound) or UPPER (score is an upper bound)
+        :param score: search score
+        :param move: best move found, or None
+        :param ply: distance of the position from the root of the search
+        """
+        index = key & self.mask
+        entry = self.entries[index]
+        if entry is None or entry[0] == key or depth >= entry[1] or self.generations[index] != self.generation:
+            self.entries[index] = (key, depth, flag, score_to_table(score, ply), move)
+            self.generations[index] = self.generation
+
+    def new_search(self):
+        """
+        Start a new generation, the entries stored so far may be replaced by shallower ones
+        """
+        self.generation = (self.generation + 1) & 0xFF
+
+    def clear(self):
+        self.entries = [None] * (self.mask + 1)
+        self.generations = bytearray(self.mask + 1)
+        self.generation = 0
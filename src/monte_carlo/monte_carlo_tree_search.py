@@ -1,136 +1,250 @@
-from copy import deepcopy
 from checkers.constants import WHITE, BLACK
-from checkers import simulation
+from checkers.stats import SearchStats
+from .node_store import NodeStore
 import random
+import math
+import time
 
 
-def monte_carlo_tree_search(board, isRoot_F, color_turn, game, rollout_depth, iterations, max_iterations):
+def monte_carlo_tree_search(board, isRoot_F, color_turn, game, rollout_depth, iterations, max_iterations, stats=None,
+                            tablebase=None):
     """
     (Tree traversal -> Node expansion -> Rollout -> Backpropagation)
     Algorithm: Start with passed state (board)
     if it is a leaf node:
-        If the value of the node (board) is zero:
+        If the node has not been visited:
             Rollout -> Back propagate
         Else:
             foreach available action, add a new state to tree and pass the set the first child as current node and Rollout -> Back propagate
     Else:
-        Set the current node to the child node that maximizes the upper bound confidence interval (see in board class) then repeat check for leaf node
+        Set the current node to the child node that maximizes the upper bound confidence interval then repeat check for leaf node
+    Runs as a loop over an MCTS node store, see MCTS
     :param board: current board state
-    :param isRoot_F: if this is the original root: True else False
+    :param isRoot_F: kept for compatibility, the search always starts at board
     :param color_turn: Whose turn to start the search
     :param game: game logic
     :param rollout_depth: how far are rollouts are
     :param iterations: current iterations of the search loop
     :param max_iterations: the maximimum number of iterations we want to seach
+    :param stats: SearchStats to count the work of the search into
+    :param tablebase: checkers.tablebase.Tablebase to score positions with few pieces
     :return: Best board from available actions
     """
-    if isRoot_F:
-        board.add_children(simulation.get_all_moves(board, color_turn))
+    return MCTS(stats=stats, tablebase=tablebase).search(board, color_turn, rollout_depth, max(1, max_iterations - iterations))
 
-    current = board
 
-    if iterations == max_iterations:
-        for c in current.get_children():
-            curr = current.get_best_child(iterations)
-            curr.reset_mcts()
-        return curr
-
-    while current.get_children_len() > 0:
-        current = current.get_best_child(iterations)
-
-    if current.get_visits == 0:
-        # Rollout
-        current_rollout, color = rollout(current, color_turn, rollout_depth)
-        # Back propagation
-        curr_p = None
-        curr_p = back_propagate(current, curr_p, current_rollout, color, color_turn)
-        return monte_carlo_tree_search(curr_p, False, color_turn, game, rollout_depth, iterations + 1, max_iterations)
-
-    else:
-        if current.get_children_len() == 0:
-            current.add_children(simulation.get_all_moves(current, color_turn))
-
-        current = current.get_best_child(iterations)
-
-        # Rollout
-        current_rollout, color = rollout(current, color_turn, rollout_depth)
-        # Back propagation
-        curr_p = None
-        curr_p = back_propagate(current, curr_p, current_rollout, color, color_turn)
-        return monte_carlo_tree_search(curr_p, False, color_turn, game, rollout_depth, iterations + 1, max_iterations)
-
-
-def rollout(current, color_turn, rollout_depth):
-    """
-    Simulate plays randomly to a set depth
-    :param current: node to rollout from
-    :param color_turn: what turn it is
-    :param rollout_depth: how far to rollout/simulate
-    :return: current node for rollout and color the simulation ended on
-    """
-    color = color_turn
-    current_rollout = current
-    r_iter = 0
-    while not current_rollout.winner() is not None or r_iter < rollout_depth:
-        r_iter += 1
-        current_rollout = get_random_move(current_rollout, color)
-        if color == WHITE:
-            color = BLACK
-        else:
-            color = WHITE
-        if r_iter == rollout_depth and color != color_turn:
-            r_iter -= 1
-    return current_rollout, color
-
-
-def get_random_move(board, color):
+class MCTS:
     """
-    Get board from random legal move
-    :param board: current board
-    :param color: turn color
-    :return: new board generated from random move
+    Iterative Monte Carlo Tree Search over a NodeStore. The board is walked down the tree with make_move/unmake_move, so
+    memory only grows with the number of nodes (bounded by the store capacity) and not with positions.
+    With reuse, the subtree of the position searched next is kept: after our move and the reply the new position is
+    looked up by hash two plies below the old root
     """
-    pieces = board.get_all_pieces_move(color)
-    piece = random.choice(pieces)
-    valid_moves = board.get_valid_moves(piece)
-    move = random.choice(list(valid_moves.keys()))
-    skip = valid_moves[move]
 
-    temp_board = deepcopy(board)
-    temp_piece = temp_board.get_piece(piece.row, piece.col)
-    new_board = simulation.simulate_move(temp_piece, move, temp_board, skip)
-
-    return new_board
-
-
-def back_propagate(current, curr_p, current_rollout, color, color_turn):
-    """
-    Back propagate to the root and at each node add a visit and a score (100 if win -100 if loss if no end state: heuristic score)
-    :param current: current node
-    :param curr_p: future parent node
-    :param current_rollout: node we are rolling out from
-    :param color: color turn we end on
-    :param color_turn: current color turn
-    :return: curr_p
-    """
-    while current is not None:
-        if current_rollout.winner is not None:
-            if color == color_turn:
-                current.add_to_total_score(100)
+    def __init__(self, capacity=1 << 20, exploration=math.sqrt(2), reuse=False, stats=None, tablebase=None):
+        """
+        :param capacity: maximum number of tree nodes
+        :param exploration: UCB exploration constant
+        :param reuse: keep the matching subtree between searches
+        :param stats: SearchStats to count into (nodes walked, rollouts as evaluations), a new one is made if None
+        :param tablebase: checkers.tablebase.Tablebase, leaves and rollouts reaching a position it holds take its result
+        """
+        self.capacity = capacity
+        self.exploration = exploration
+        self.reuse = reuse
+        self.store = None
+        self.root_color = None
+        self.iterations = 0
+        self.rollouts = 0
+        # visits of the root kept from the previous search
+        self.reused_visits = 0
+        self.elapsed = 0.0
+        self.stats = stats if stats is not None else SearchStats()
+        self.tablebase = tablebase
+
+    def search(self, board, color_turn, rollout_depth, max_iterations):
+        """
+        :param board: current board state (not changed)
+        :param color_turn: Whose turn to start the search
+        :param rollout_depth: maximum number of random moves in a rollout
+        :param max_iterations: number of iterations to run
+        :return: board after the most visited move, or None if color_turn has no move
+        """
+        start = time.perf_counter()
+        self.iterations = self.rollouts = 0
+        store = self._root(board, color_turn)
+        work = board.copy()
+        stats = self.stats
+        stats.boards += 1
+
+        while self.iterations < max_iterations:
+            self.iterations += 1
+            node, color, undos = self._select(store, work, color_turn)
+            stats.nodes += len(undos) + 1
+            stats.evaluations += 1
+            known = self._known_value(store, node, work, color)
+            if known is not None:
+                value = known
             else:
-                current.add_to_total_score(-100)
-        elif current_rollout.winner_exception()[1]:
-            if color == color_turn:
-                current.add_to_total_score(100)
+                self.rollouts += 1
+                stats.boards += 1
+                value = -rollout(work.copy(), color, rollout_depth, self.tablebase)
+            for undo in reversed(undos):
+                work.unmake_move(undo)
+            self._back_propagate(store, node, value)
+
+        self.elapsed = time.perf_counter() - start
+        stats.time += self.elapsed
+        return self._best_board(store, board)
+
+    def _root(self, board, color_turn):
+        """
+        Start a new tree at board, or re-root the previous tree on it
+        :return: NodeStore with board at its root (expanded)
+        """
+        store = None
+        if self.reuse and self.store is not None:
+            if color_turn == self.root_color:
+                node = self.store.find(board.hash, 0)
+                if node < 0:
+                    node = self.store.find(board.hash, 2)
             else:
-                current.add_to_total_score(-100)
-        else:
-            if color == WHITE:
-                current.add_to_total_score(current.white_heuristic_eval_1())
-            else:
-                current.add_to_total_score(current.black_heuristic_eval_1())
-
-        current.increment_visit()
-        curr_p = current
-        current = current.get_parent()
-    return curr_p
+                node = self.store.find(board.hash, 1)
+            if node >= 0:
+                store = self.store.subtree(node)
+        self.reused_visits = store.visits[0] if store is not None else 0
+        if store is None:
+            store = NodeStore(self.capacity)
+            store.hash[0] = board.hash
+        if not store.is_expanded(0):
+            store.expand(0, list(board.generate_moves(color_turn)))
+        self.store = store
+        self.root_color = color_turn
+        return store
+
+    def _select(self, store, board, color, virtual_loss=False):
+        """
+        Walk down by best UCB child, playing the moves on board, and expand the leaf if it was visited before
+        :param store: NodeStore
+        :param board: board at the root, left at the leaf
+        :param color: color to move at the root
+        :param virtual_loss: add a pending rollout to every node of the path
+        :return: (leaf node, color to move at the leaf, undo tokens of the moves played)
+        """
+        undos = []
+        node = 0
+        while board.winner() is None and not (undos and board.is_draw()):
+            if not store.is_expanded(node):
+                if store.visits[node] + store.pending[node] == 0:
+                    break
+                if not store.expand(node, list(board.generate_moves(color))):
+                    break
+            if not store.child_count[node]:
+                break
+            if virtual_loss:
+                store.pending[node] += 1
+            node = store.get_best_child(node, self.exploration)
+            undos.append(board.make_move(store.get_move(node)))
+            if not store.hash[node]:
+                store.hash[node] = board.hash
+            color = BLACK if color == WHITE else WHITE
+        if virtual_loss:
+            store.pending[node] += 1
+        return node, color, undos
+
+    @staticmethod
+    def _is_terminal(store, node, board):
+        """
+        :return: True if the player to move at the leaf has no pieces or no moves
+        """
+        return board.winner() is not None or (store.is_expanded(node) and not store.child_count[node])
+
+    def _known_value(self, store, node, board, color):
+        """
+        Result of a leaf that needs no rollout: a finished game, a draw or a tablebase position
+        :param store: NodeStore
+        :param node: leaf
+        :param board: board at the leaf
+        :param color: color to move at the leaf
+        :return: value for the player who moved into the leaf, or None if it must be rolled out
+        """
+        if self._is_terminal(store, node, board):
+            # the player to move has lost, a win for the player who moved into the leaf
+            return 1.0
+        if node and board.is_draw():
+            return 0.0
+        if self.tablebase is not None:
+            value = self.tablebase.value(board, color)
+            if value is not None:
+                self.stats.tablebase_hits += 1
+                return -float(value)
+        return None
+
+    @staticmethod
+    def _back_propagate(store, node, value, virtual_loss=False):
+        """
+        Add a result to a leaf and its ancestors, flipping the point of view at every level
+        :param store: NodeStore
+        :param node: leaf
+        :param value: result for the player who moved into the leaf (-1 to 1)
+        :param virtual_loss: remove the pending rollout added by _select
+        """
+        while node >= 0:
+            if virtual_loss:
+                store.pending[node] -= 1
+            store.visits[node] += 1
+            store.value[node] += value
+            value = -value
+            node = store.parent[node]
+
+    def _best_board(self, store, board):
+        """
+        :return: board after the most visited root move, or None if the root has no moves
+        """
+        best = store.get_most_visited_child(0)
+        if best < 0:
+            return None
+        self.stats.boards += 1
+        new_board = board.copy()
+        new_board.make_move(store.get_move(best))
+        return new_board
+
+    def iterations_per_second(self):
+        return self.iterations / self.elapsed if self.elapsed else 0.0
+
+    def rollouts_per_second(self):
+        return self.rollouts / self.elapsed if self.elapsed else 0.0
+
+
+def rollout(board, color, rollout_depth, tablebase=None):
+    """
+    Simulate plays randomly (in place on board) until a side has no pieces or no moves, the game is drawn, or
+    rollout_depth moves were played
+    :param board: board to play on
+    :param color: color to move
+    :param rollout_depth: how far to rollout/simulate
+    :param tablebase: checkers.tablebase.Tablebase, the rollout stops with its result once it reaches a position in it
+    :return: 1 if color won, -1 if it lost, 0 for a draw, otherwise its share of the material difference (-1 to 1)
+    """
+    start_color = color
+    for _ in range(rollout_depth):
+        winner = board.winner()
+        if winner is not None:
+            return 1 if winner == start_color else -1
+        if board.is_draw():
+            return 0
+        if tablebase is not None and board.white_left + board.black_left <= tablebase.pieces:
+            value = tablebase.value(board, color)
+            if value is not None:
+                return value if color == start_color else -value
+        moves = list(board.generate_moves(color))
+        if not moves:
+            return -1 if color == start_color else 1
+        board.make_move(random.choice(moves))
+        color = BLACK if color == WHITE else WHITE
+
+    winner = board.winner()
+    if winner is not None:
+        return 1 if winner == start_color else -1
+    own, opponent = (board.white_left, board.black_left) if start_color == WHITE else (board.black_left, board.white_left)
+    return (own - opponent) / (own + opponent)
@@ -0,0 +1,136 @@
+from checkers.move import Move
+from array import array
+import math
+
+
+class NodeStore:
+    """
+    Monte Carlo search tree kept in parallel arrays, a node is an index into them and the root is node 0.
+    The children of a node sit next to each other, from first_child to first_child + child_count
+    (first_child is -1 until the node is expanded). Positions are not stored: a node keeps the move that leads to it
+    and the hash of its position (0 until the node is first played into).
+    value is the sum of results from the point of view of the player who played the node's move.
+    Nodes are only added while there are fewer than capacity of them
+    """
+
+    def __init__(self, capacity=1 << 20):
+        """
+        :param capacity: maximum number of nodes
+        """
+        self.capacity = capacity
+        self.parent = array('i')
+        self.first_child = array('i')
+        self.child_count = array('H')
+        self.visits = array('I')
+        self.value = array('d')
+        # rollouts started below the node and not back yet (virtual loss of parallel searches)
+        self.pending = array('I')
+        self.hash = array('Q')
+        self.start = array('L')
+        self.end = array('L')
+        self.captured = array('L')
+        self.promotion = bytearray()
+        self._add(-1, 0, 0, 0, False)
+
+    def __len__(self):
+        return len(self.parent)
+
+    def _add(self, parent, start, end, captured, promotion):
+        self.parent.append(parent)
+        self.first_child.append(-1)
+        self.child_count.append(0)
+        self.visits.append(0)
+        self.value.append(0.0)
+        self.pending.append(0)
+        self.hash.append(0)
+        self.start.append(start)
+        self.end.append(end)
+        self.captured.append(captured)
+        self.promotion.append(promotion)
+
+    def expand(self, node, moves):
+        """
+        Add a child for every move
+        :param node: node to expand
+        :param moves: list of Move of the node's position
+        :return: False if the store is full (the node stays unexpanded)
+        """
+        if len(self) + len(moves) > self.capacity:
+            return False
+        self.first_child[node] = len(self)
+        self.child_count[node] = len(moves)
+        for move in moves:
+            self._add(node, move.start, move.end, move.captured, move.promotion)
+        return True
+
+    def is_expanded(self, node):
+        return self.first_child[node] >= 0
+
+    def children(self, node):
+        first = self.first_child[node]
+        return range(first, first + self.child_count[node]) if first >= 0 else range(0)
+
+    def get_move(self, node):
+        return Move(self.start[node], self.end[node], self.captured[node], bool(self.promotion[node]))
+
+    def get_best_child(self, node, exploration):
+        """
+        Child with the best upper confidence bound, counting pending rollouts as losses so that concurrent selections
+        spread over different leaves. Unvisited children come first
+        :param node: expanded node
+        :param exploration: exploration constant
+        :return: child node
+        """
+        visits, value, pending = self.visits, self.value, self.pending
+        log_visits = math.log(visits[node] + pending[node] + 1)
+        best, best_child = float('-inf'), -1
+        for child in self.children(node):
+            n = visits[child] + pending[child]
+            if n == 0:
+                return child
+            ucb = (value[child] - pending[child]) / n + exploration * math.sqrt(log_visits / n)
+            if ucb > best:
+                best, best_child = ucb, child
+        return best_child
+
+    def get_most_visited_child(self, node):
+        return max(self.children(node), key=self.visits.__getitem__, default=-1)
+
+    def find(self, position_hash, depth):
+        """
+        Find a node of the given depth below the root by position hash
+        :param position_hash: Board.hash of the position
+        :param depth: 0 (root), 1 or 2
+        :return: node, or -1 if it is not in the tree
+        """
+        level = [0]
+        for _ in range(depth):
+            level = [child for node in level for child in self.children(node)]
+        for node in level:
+            if self.hash[node] == position_hash:
+                return node
+        return -1
+
+    def subtree(self, node):
+        """
+        Copy the subtree of a node into a new, compact store with the node as its root
+        :param node: new root
+        :return: NodeStore
+        """
+        store = NodeStore(self.capacity)
+        store.visits[0] = self.visits[node]
+        store.value[0] = self.value[node]
+        store.hash[0] = self.hash[node]
+        queue = [(node, 0)]
+        for old, new in queue:
+            if not self.is_expanded(old):
+                continue
+            store.first_child[new] = len(store)
+            store.child_count[new] = self.child_count[old]
+            for child in self.children(old):
+                queue.append((child, len(store)))
+                store._add(new, self.start[child], self.end[child], self.captured[child], self.promotion[child])
+                store.visits[-1] = self.visits[child]
+                store.value[-1] = self.value[child]
+                store.hash[-1] = self.hash[child]
+        return store
@@ -0,0 +1,130 @@
+from checkers.board import Board
+from checkers.tablebase import Tablebase
+from .monte_carlo_tree_search import MCTS, rollout
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import random
+import math
+import time
+import os
+
+# tablebases opened by a worker process, by path
+_tablebases = {}
+
+
+def parallel_monte_carlo_tree_search(board, color_turn, rollout_depth, max_iterations, workers=None,
+                                     rollouts_per_leaf=8, stats=None, tablebase=None):
+    """
+    Monte Carlo Tree Search with the rollouts run by a process pool. See ParallelMCTS
+    :param board: current board state
+    :param color_turn: Whose turn to start the search
+    :param rollout_depth: how far are rollouts are
+    :param max_iterations: number of leaves to select and roll out from
+    :param workers: number of worker processes (os.cpu_count() if None)
+    :param rollouts_per_leaf: random playouts run for every selected leaf
+    :param stats: SearchStats to count the work of the search into
+    :param tablebase: checkers.tablebase.Tablebase to score positions with few pieces
+    :return: Best board from available actions
+    """
+    with ParallelMCTS(workers, rollouts_per_leaf, stats=stats, tablebase=tablebase) as search:
+        return search.search(board, color_turn, rollout_depth, max_iterations)
+
+
+class ParallelMCTS(MCTS):
+    """
+    Tree and leaf parallel Monte Carlo Tree Search. Up to parallel_leaves leaves are selected at once (tree parallel,
+    kept apart by virtual loss) and each selected leaf gets rollouts_per_leaf random playouts in a worker process (leaf
+    parallel). Results are backed up as soon as they arrive, as one visit with the mean result, and a new leaf is
+    selected in their place
+    """
+
+    def __init__(self, workers=None, rollouts_per_leaf=8, parallel_leaves=None, capacity=1 << 20,
+                 exploration=math.sqrt(2), reuse=False, stats=None, tablebase=None):
+        """
+        :param workers: number of worker processes (os.cpu_count() if None)
+        :param rollouts_per_leaf: random playouts run for every selected leaf
+        :param parallel_leaves: leaves being rolled out at once (twice the workers if None)
+        :param capacity: maximum number of tree nodes
+        :param exploration: UCB exploration constant
+        :param reuse: keep the matching subtree between searches
+        :param stats: SearchStats to count into, a new one is made if None
+        :param tablebase: checkers.tablebase.Tablebase, workers open the same file for their rollouts
+        """
+        super().__init__(capacity, exploration, reuse, stats, tablebase)
+        self.workers = workers or os.cpu_count()
+        self.rollouts_per_leaf = rollouts_per_leaf
+        self.parallel_leaves = parallel_leaves or 2 * self.workers
+        self.executor = ProcessPoolExecutor(self.workers, initializer=random.seed)
+
+    def search(self, board, color_turn, rollout_depth, max_iterations):
+        """
+        :param board: current board state (not changed)
+        :param color_turn: Whose turn to start the search
+        :param rollout_depth: maximum number of random moves in a rollout
+        :param max_iterations: number of leaves to select and roll out from
+        :return: board after the most visited move, or None if color_turn has no move
+        """
+        start = time.perf_counter()
+        self.iterations = self.rollouts = 0
+        store = self._root(board, color_turn)
+        work = board.copy()
+        stats = self.stats
+        stats.boards += 1
+
+        in_flight = {}
+        tablebase_path = self.tablebase.path if self.tablebase is not None else None
+        while self.iterations < max_iterations or in_flight:
+            while self.iterations < max_iterations and len(in_flight) < self.parallel_leaves:
+                self.iterations += 1
+                node, color, undos = self._select(store, work, color_turn, virtual_loss=True)
+                stats.nodes += len(undos) + 1
+                known = self._known_value(store, node, work, color)
+                if known is not None:
+                    stats.evaluations += 1
+                    self._back_propagate(store, node, known, virtual_loss=True)
+                else:
+                    in_flight[self.executor.submit(_rollouts, work.to_bytes(color), rollout_depth,
+                                                   self.rollouts_per_leaf, tablebase_path)] = node
+                for undo in reversed(undos):
+                    work.unmake_move(undo)
+
+            if in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    node = in_flight.pop(future)
+                    # rollout results are from the point of view of the player to move at the leaf
+                    self._back_propagate(store, node, -future.result() / self.rollouts_per_leaf, virtual_loss=True)
+                    self.rollouts += self.rollouts_per_leaf
+                    stats.evaluations += self.rollouts_per_leaf
+                    # the worker unpacks the leaf and copies it for every rollout
+                    stats.boards += 1 + self.rollouts_per_leaf
+
+        self.elapsed = time.perf_counter() - start
+        stats.time += self.elapsed
+        return self._best_board(store, board)
+
+    def close(self):
+        self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _rollouts(position, rollout_depth, count, tablebase_path=None):
+    """
+    Worker task: random playouts from one leaf
+    :param position: Board.to_bytes of the leaf
+    :param rollout_depth: maximum number of moves per playout
+    :param count: number of playouts
+    :param tablebase_path: tablebase file to end playouts with, None for none
+    :return: sum of the results for the player to move at the leaf
+    """
+    tablebase = None
+    if tablebase_path is not None:
+        if tablebase_path not in _tablebases:
+            _tablebases[tablebase_path] = Tablebase(tablebase_path)
+        tablebase = _tablebases[tablebase_path]
+    leaf, color = Board.from_bytes(position)
+    return sum(rollout(leaf.copy(), color, rollout_depth, tablebase) for _ in range(count))
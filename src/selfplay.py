@@ -0,0 +1,233 @@
+"""
+Play AI against AI games without a window, spread over a process pool, and write one JSON line per finished game.
+
+    python selfplay.py --games 1000 --black alpha_beta:depth=4,heuristic=3 --white monte_carlo_tree_search:iterations=400
+
+An engine is given as name:parameter=value,... with the names and defaults in session.ENGINES. Each side plays a game
+with one EngineSession, which keeps its search state between moves (--no-reuse searches every move from scratch).
+--positions also dumps every position played, with the result of its game, to a checkers.position_file file, and
+--pdn appends the moves of every game to a PDN file (see checkers.pdn and analyze.py).
+"""
+from checkers.board import Board
+from checkers.constants import WHITE, BLACK, DRAW
+from checkers.stats import SearchStats
+from checkers.position_file import PositionWriter
+from checkers import pdn
+from minimax.opening_book import OpeningBook
+from session import EngineSession, ENGINES
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import argparse
+import random
+import json
+import time
+import sys
+
+
+def parse_engine(spec):
+    """
+    :param spec: name:parameter=value,... (parameters not given keep their default)
+    :return: (name, parameters)
+    """
+    name, _, options = spec.partition(':')
+    if name not in ENGINES:
+        raise argparse.ArgumentTypeError('unknown engine %r, expected one of %s' % (name, ', '.join(ENGINES)))
+    params = dict(ENGINES[name])
+    for option in filter(None, options.split(',')):
+        key, _, value = option.partition('=')
+        if key not in params:
+            raise argparse.ArgumentTypeError('unknown parameter %r for %s' % (key, name))
+        params[key] = type(params[key])(value)
+    return name, params
+
+
+def play_game(black, white, seed, random_plies=0, max_plies=200, book=None, reuse=True, positions=False,
+              record=False):
+    """
+    Play one game, black moves first. It ends when a side has no pieces or no move, or is drawn by repetition or
+    by the no progress rule (see Board.result)
+    :param black: (name, parameters) of the black engine
+    :param white: (name, parameters) of the white engine
+    :param seed: seed of the random opening moves and the Monte Carlo rollouts
+    :param random_plies: number of random moves played before the engines take over
+    :param max_plies: the game is a draw after this many moves
+    :param book: opening book file both engines play from while the game is in it, None for no book
+    :param reuse: keep each engine's search state between its moves
+    :param positions: also return the Board.to_bytes of every position played, under 'positions'
+    :param record: also return the PDN text of every move played, under 'moves'
+    :return: {'winner', 'plies', 'move_times', 'nodes', 'stats'}, winner 'black', 'white' or None for a draw,
+    stats the SearchStats.as_dict() of each color
+    """
+    random.seed(seed)
+    opening_book = OpeningBook(book) if book else None
+    board = Board()
+    color = BLACK
+    stats = {BLACK: SearchStats(), WHITE: SearchStats()}
+    sessions = {color: EngineSession(name, color, params, stats[color], reuse=reuse)
+                for color, (name, params) in ((BLACK, black), (WHITE, white))}
+    move_times, nodes, played, moves_played = [], [], [], []
+    result = board.result(color)
+    plies = 0
+    while result is None and plies < max_plies:
+        if positions:
+            played.append(board.to_bytes(color))
+        if plies < random_plies:
+            moves = list(board.generate_moves(color))
+            new_board = _play(board, random.choice(moves))
+        else:
+            # a book move is played instantly, without search
+            new_board = opening_book.play(board, color) if opening_book is not None else None
+            if new_board is not None:
+                move_times.append(0.0)
+                nodes.append(0)
+            else:
+                searched = stats[color].nodes
+                start = time.perf_counter()
+                new_board = sessions[color].move(board)
+                move_times.append(round(time.perf_counter() - start, 6))
+                nodes.append(stats[color].nodes - searched)
+        if record:
+            move = pdn.played_move(board, color, new_board)
+            moves_played.append(pdn.move_text(move.start, move.end, move.captured))
+        board = new_board
+        color = _other(color)
+        plies += 1
+        result = board.result(color)
+    winner = result if result != DRAW else None
+    if opening_book is not None:
+        opening_book.close()
+
+    game = {'winner': _color_name(winner), 'plies': plies, 'move_times': move_times, 'nodes': nodes,
+            'stats': {'black': stats[BLACK].as_dict(), 'white': stats[WHITE].as_dict()}}
+    if positions:
+        game['positions'] = played
+    if record:
+        game['moves'] = moves_played
+    return game
+
+
+def run(games, black, white, output, workers=None, seed=0, random_plies=0, max_plies=200, alternate=False,
+        book=None, reuse=True, positions=None, pdn_path=None):
+    """
+    Play games over a process pool and append a JSON line to output as each one finishes
+    :param games: number of games
+    :param black: engine spec (see parse_engine) playing black
+    :param white: engine spec playing white
+    :param output: writable text file
+    :param workers: number of worker processes (os.cpu_count() if None)
+    :param seed: seed of the first game, game i uses seed + i
+    :param random_plies: random moves at the start of every game
+    :param max_plies: moves before a game is a draw
+    :param alternate: swap the engines' colors every other game
+    :param book: opening book file the engines play from, None for no book
+    :param reuse: keep each engine's search state between its moves
+    :param positions: position file to write every position played to, with the result of its game for the side
+    to move as a signed byte (1 win, 0 draw, -1 loss); None for no file
+    :param pdn_path: PDN file to append every game to, None for no file
+    :return: {(engine spec, 'black' or 'white'): wins with that color} and the number of draws under None
+    """
+    # by color as well as engine, so the two sides of a game between the same specs are counted apart
+    pairings = ((black, white), (white, black)) if alternate else ((black, white),)
+    score = {(spec, color): 0 for pairing in pairings for spec, color in zip(pairing, ('black', 'white'))}
+    score[None] = 0
+    writer = PositionWriter(positions, data_size=1) if positions else None
+    pdn_file = open(pdn_path, 'a') if pdn_path else None
+    with ProcessPoolExecutor(workers) as executor:
+        futures = {}
+        for game in range(games):
+            colors = (white, black) if alternate and game % 2 else (black, white)
+            futures[executor.submit(play_game, parse_engine(colors[0]), parse_engine(colors[1]), seed + game,
+                                    random_plies, max_plies, book, reuse, writer is not None,
+                                    pdn_file is not None)] = (game, colors)
+        for future in as_completed(futures):
+            game, (black_spec, white_spec) = futures[future]
+            result = future.result()
+            if writer is not None:
+                _write_positions(writer, result.pop('positions'), result['winner'])
+            if pdn_file is not None:
+                tags = {'Event': 'selfplay', 'Round': game + 1, 'Black': black_spec, 'White': white_spec}
+                # games stopped at max_plies count as draws here as in the score
+                result_text = {'black': '1-0', 'white': '0-1', None: '1/2-1/2'}[result['winner']]
+                pdn.write_game(pdn_file, pdn.PdnGame(tags, result.pop('moves'), result=result_text))
+            record = {'game': game, 'seed': seed + game, 'black': black_spec, 'white': white_spec}
+            record.update(result)
+            output.write(json.dumps(record) + '\n')
+            output.flush()
+            winner = result['winner']
+            score[(record[winner], winner) if winner else None] += 1
+    if writer is not None:
+        writer.close()
+    if pdn_file is not None:
+        pdn_file.close()
+    return score
+
+
+def _write_positions(writer, positions, winner):
+    """
+    Write the positions of a game with its result for the side to move of each
+    :param positions: Board.to_bytes of the positions, in the order they were played
+    :param winner: 'black', 'white' or None for a draw
+    """
+    for ply, position in enumerate(positions):
+        if winner is None:
+            value = 0
+        else:
+            # black moves first, so black is to move on even plies
+            value = 1 if (winner == 'black') == (ply % 2 == 0) else 0xFF
+        writer.write_encoded(position, bytes((value,)))
+
+
+def _play(board, move):
+    """
+    :return: new board after move, or None if there is no move
+    """
+    if move is None:
+        return None
+    new_board = board.copy()
+    new_board.make_move(move)
+    return new_board
+
+
+def _other(color):
+    return BLACK if color == WHITE else WHITE
+
+
+def _color_name(color):
+    if color is None:
+        return None
+    return 'white' if color == WHITE else 'black'
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Play AI against AI games without rendering')
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--black', default='alpha_beta', help='engine spec, e.g. alpha_beta:depth=4,heuristic=3')
+    parser.add_argument('--white', default='monte_carlo_tree_search', help='engine spec of the white player')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--random-plies', type=int, default=2, help='random opening moves so games differ')
+    parser.add_argument('--max-plies', type=int, default=200)
+    parser.add_argument('--alternate', action='store_true', help='swap colors every other game')
+    parser.add_argument('--book', help='opening book file (python -m minimax.opening_book) the engines play from')
+    parser.add_argument('--no-reuse', action='store_true', help='search every move from scratch')
+    parser.add_argument('--positions', help='file to dump every position played to, with the result of its game')
+    parser.add_argument('--pdn', help='PDN file to append the moves of every game to')
+    parser.add_argument('--out', default='-', help='JSONL file to append results to (- for stdout)')
+    args = parser.parse_args()
+    for spec in (args.black, args.white):
+        try:
+            parse_engine(spec)
+        except argparse.ArgumentTypeError as error:
+            parser.error(str(error))
+
+    out = sys.stdout if args.out == '-' else open(args.out, 'a')
+    try:
+        start = time.perf_counter()
+        score = run(args.games, args.black, args.white, out, args.workers, args.seed, args.random_plies,
+                    args.max_plies, args.alternate, args.book, not args.no_reuse, args.positions, args.pdn)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    draws = score.pop(None)
+    print('%s  draws: %d  (%.1f games/hour)' % (
+        '  '.join('%s as %s: %d' % (spec, color, wins) for (spec, color), wins in score.items()), draws,
+        args.games * 3600 / (time.perf_counter() - start)), file=sys.stderr)
@@ -0,0 +1,136 @@
+"""
+Engines kept for a whole game. An EngineSession plays the moves of one color and keeps what its searches learned
+from one move to the next: the transposition table and move ordering history of alpha beta, and the Monte Carlo tree,
+re-rooted on the position the opponent's reply leads to.
+
+    session = EngineSession('iterative_deepening', WHITE, {'time': 1000, 'max_depth': 64, 'heuristic': 2})
+    new_board = session.move(board)
+"""
+from checkers.constants import WHITE, BLACK
+from checkers.stats import SearchStats
+from minimax.minimax import minimax
+from minimax.alpha_beta import AlphaBeta
+from minimax.iterative_deepening import deepen
+from minimax.transposition import TranspositionTable
+from monte_carlo.monte_carlo_tree_search import MCTS
+import time
+
+# engine name -> default parameters
+ENGINES = {
+    'minimax': {'depth': 3, 'heuristic': 2},
+    'alpha_beta': {'depth': 4, 'heuristic': 2},
+    'iterative_deepening': {'time': 100, 'max_depth': 64, 'heuristic': 2},
+    'monte_carlo_tree_search': {'iterations': 200, 'rollout_depth': 10},
+}
+
+
+class EngineSession:
+    """
+    One engine playing one color over a game. Transposition table entries are keyed by position, so they stay valid
+    whatever the opponent plays; every move starts a new table generation so entries of positions left behind give
+    way to new ones. The Monte Carlo tree keeps the subtree of the position reached after the opponent's reply
+    """
+
+    def __init__(self, engine, color, params=None, stats=None, tablebase=None, reuse=True):
+        """
+        :param engine: name in ENGINES
+        :param color: color the session plays
+        :param params: parameters of the engine, the ones not given keep their ENGINES default
+        :param stats: SearchStats to count the work of every move into, a new one is made if None
+        :param tablebase: checkers.tablebase.Tablebase to score positions with few pieces
+        :param reuse: keep the search state between moves, False starts every move from scratch
+        """
+        if engine not in ENGINES:
+            raise ValueError('unknown engine %r, expected one of %s' % (engine, ', '.join(ENGINES)))
+        self.engine = engine
+        self.color = color
+        self.other = BLACK if color == WHITE else WHITE
+        self.params = dict(ENGINES[engine], **(params or {}))
+        self.stats = stats if stats is not None else SearchStats()
+        self.tablebase = tablebase
+        self.reuse = reuse
+        self.search = None
+        self.mcts = None
+        # score and depth of the last move searched (None for Monte Carlo)
+        self.value = None
+        self.depth = None
+        # visits of the Monte Carlo root kept from the previous move, by move
+        self.reused_visits = []
+        self._new_state()
+
+    def new_game(self):
+        """
+        Forget everything learned, for a new game
+        """
+        self._new_state()
+        self.reused_visits = []
+
+    def _new_state(self):
+        if self.engine in ('alpha_beta', 'iterative_deepening'):
+            self.search = AlphaBeta(self.params['heuristic'], self.color, self.other, TranspositionTable(),
+                                    stats=self.stats, tablebase=self.tablebase)
+        elif self.engine == 'monte_carlo_tree_search':
+            self.mcts = MCTS(reuse=True, stats=self.stats, tablebase=self.tablebase)
+
+    def move(self, board):
+        """
+        Search the best move of the session's color
+        :param board: current board (not changed)
+        :return: board after the best move, None if the session's color has no move
+        """
+        if not self.reuse:
+            self._new_state()
+        params = self.params
+        if self.engine == 'minimax':
+            self.value, new_board = minimax(board, params['depth'], True, None, params['heuristic'], self.color,
+                                            self.other, self.stats)
+            self.depth = params['depth']
+            return new_board
+        if self.engine == 'monte_carlo_tree_search':
+            return self._mcts_move(board)
+
+        search = self.search
+        start = time.perf_counter()
+        search.tt.new_search()
+        search.stats.boards += 1
+        if self.engine == 'alpha_beta':
+            search.orderer.new_search()
+            self.value, best_move = search.search(board.copy(), params['depth'], True, float('-inf'), float('inf'))
+            self.depth = params['depth']
+        else:
+            self.value, best_move, self.depth = deepen(search, board.copy(), start + params['time'] / 1000,
+                                                       params['max_depth'])
+        search.stats.time += time.perf_counter() - start
+        if best_move is None:
+            return board if board.winner() else None
+        search.stats.boards += 1
+        new_board = board.copy()
+        new_board.make_move(best_move)
+        return new_board
+
+    def score_move(self, board, move):
+        """
+        Score a move of the session's color with the search of the last move, to the same depth, so that it compares
+        with the score of the best move (not for Monte Carlo, which has no scores)
+        :param board: board the last move was searched on (not changed)
+        :param move: Move of the session's color on board
+        :return: score of move for the session's color
+        """
+        if self.engine == 'monte_carlo_tree_search':
+            raise ValueError('Monte Carlo moves have no score')
+        # alpha beta returns the minimax score, so it also scores the moves of the minimax engine
+        search = self.search or AlphaBeta(self.params['heuristic'], self.color, self.other, stats=self.stats)
+        search.deadline = None
+        child = board.copy()
+        child.make_move(move)
+        return search.search(child, max(self.depth - 1, 0), False, float('-inf'), float('inf'), 1)[0]
+
+    def _mcts_move(self, board):
+        """
+        Monte Carlo move, continuing the tree of the previous move when it holds the position
+        :return: board after the most visited move, None if there is no move
+        """
+        new_board = self.mcts.search(board, self.color, self.params['rollout_depth'], self.params['iterations'])
+        self.reused_visits.append(self.mcts.reused_visits)
+        self.value, self.depth = None, None
+        return new_board
@@ -0,0 +1,51 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from checkers.board import Board, WIN_SCORE
+from checkers.constants import WHITE, BLACK
+from minimax.alpha_beta import AlphaBeta
+from minimax.transposition import TranspositionTable
+from minimax.shared_transposition import SharedTranspositionTable
+
+
+def _king_endgame():
+    """
+    :return: Board with white kings on square indexes 25 and 27 and a black king on 28, won by white
+    """
+    board = Board()
+    white = 1 << 25 | 1 << 27
+    black = 1 << 28
+    board.set_position(white, black, white | black)
+    return board
+
+
+class ReusedTableTest(unittest.TestCase):
+
+    def check_reused_table(self, table):
+        board = _king_endgame()
+        search = AlphaBeta(2, WHITE, BLACK, table)
+        score, move = search.search(board, 9, True, float('-inf'), float('inf'))
+        self.assertGreater(score, WIN_SCORE - 100)
+        # the next search starts two plies further into the game, with the table of the first one
+        board.make_move(move)
+        board.make_move(next(iter(board.generate_moves(BLACK))))
+        fresh = AlphaBeta(2, WHITE, BLACK).search(board.copy(), 7, True, float('-inf'), float('inf'))[0]
+        reused = search.search(board, 7, True, float('-inf'), float('inf'))[0]
+        self.assertEqual(reused, fresh)
+
+    def test_transposition_table(self):
+        self.check_reused_table(TranspositionTable())
+
+    def test_shared_transposition_table(self):
+        table = SharedTranspositionTable(1 << 16)
+        try:
+            self.check_reused_table(table)
+        finally:
+            table.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
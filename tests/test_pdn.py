@@ -0,0 +1,69 @@
+import io
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from checkers import pdn
+import analyze
+
+GAMES = '''[Event "variation"]
+1. 11-15 23-19 2. 8-11 (2. 9-14 {a comment in the variation} 22-17 (2... 27-23) *) 22-17 *
+
+[Event "nag"]
+1. 11-15 $1 23-19 $2 2. 8-11 $14 1-0
+
+[Event "bad"]
+1. 11-15 23-19 2. 8-11 ?? 22-17 *
+
+[Event "good"]
+1. 9-13 22-18 1/2-1/2
+'''
+
+
+class ReadGamesTest(unittest.TestCase):
+
+    def test_variation_is_skipped(self):
+        game = next(pdn.read_games(io.StringIO(GAMES)))
+        self.assertIsNone(game.error)
+        self.assertEqual(game.moves, ['11-15', '23-19', '8-11', '22-17'])
+        self.assertEqual(game.comments, {})
+        self.assertEqual(game.result, '*')
+        self.assertEqual(len(list(game.replay())), 4)
+
+    def test_nag_is_skipped(self):
+        game = list(pdn.read_games(io.StringIO(GAMES)))[1]
+        self.assertIsNone(game.error)
+        self.assertEqual(game.moves, ['11-15', '23-19', '8-11'])
+        self.assertEqual(game.result, '1-0')
+
+    def test_bad_game_does_not_stop_the_stream(self):
+        games = list(pdn.read_games(io.StringIO(GAMES)))
+        self.assertEqual([game.tags['Event'] for game in games], ['variation', 'nag', 'bad', 'good'])
+        self.assertEqual([game.error is not None for game in games], [False, False, True, False])
+        self.assertEqual(games[3].moves, ['9-13', '22-18'])
+
+    def test_unmatched_parenthesis(self):
+        games = list(pdn.read_games(io.StringIO('1. 11-15 (1. 9-13 *\n\n[Event "next"]\n1. 11-15 ) *\n')))
+        self.assertEqual(len(games), 2)
+        self.assertIn('(', games[0].error)
+        self.assertIn(')', games[1].error)
+
+
+class AnalyzeTest(unittest.TestCase):
+
+    def test_bad_game_is_reported_per_game(self):
+        output = io.StringIO()
+        totals = analyze.run(io.StringIO(GAMES), output, 'alpha_beta:depth=1', workers=1)
+        self.assertEqual(totals['games'], 4)
+        self.assertEqual(totals['errors'], 1)
+        self.assertEqual(totals['positions'], 4 + 3 + 2)
+        games = list(pdn.read_games(io.StringIO(output.getvalue())))
+        self.assertEqual([game.tags['Event'] for game in games], ['variation', 'nag', 'bad', 'good'])
+        self.assertNotIn('Annotator', games[2].tags)
+        self.assertIn('Annotator', games[3].tags)
+
+
+if __name__ == '__main__':
+    unittest.main()